@@ -0,0 +1,232 @@
+#!/usr/bin/env python3
+"""
+Launch Loop Benchmark
+Runs hunt.launch_instance() against the fake OCI service of fake_oci.py on a simulated
+clock and reports attempts/minute, time-to-first-success and API calls per success, so
+WAIT_TIME, AD ordering and racing can be tuned without burning real runs.
+
+Examples:
+    python benchmark.py --scenario steady --scenario throttled --runs 20
+    python benchmark.py --set REQUEST_WAIT_TIME_SECS=30 --set RACE_ALL_ADS=true
+    python benchmark.py --scenario-file my_scenario.json --json results.json
+"""
+
+import argparse
+import json
+import logging
+import os
+import random
+import shutil
+import sys
+import tempfile
+
+from dotenv import load_dotenv
+
+import fake_oci
+import hunt
+import settings
+from rate_limiter import RateLimiter
+from scheduler import LaunchPacer, launch_pacer
+
+# Settings that make the hunt talk to the fake tenancy only, without notifications
+BENCHMARK_ENV = {
+    "OCT_FREE_AD": "",
+    "OCI_IMAGE_ID": "",
+    "OCI_SUBNET_ID": "",
+    "OCI_COMPUTE_SHAPE": settings.ARM_SHAPE,
+    "OPERATING_SYSTEM": "Canonical Ubuntu",
+    "OS_VERSION": "22.04",
+    "DISPLAY_NAME": "benchmark",
+    "BOOT_VOLUME_SIZE": "50",
+    "ASSIGN_PUBLIC_IP": "false",
+    "NOTIFY_EMAIL": "False",
+    "DISCORD_WEBHOOK": "",
+    "TELEGRAM_TOKEN": "",
+    "DISCOVERY_CACHE_TTL_SECS": "0",
+    "CAPACITY_DB_FILE": "",
+    "HUNT_CHECKPOINT_MAX_AGE_SECS": "0",
+}
+
+
+def percentile(values, pct):
+    """Nearest-rank percentile of a list, None when it is empty."""
+    if not values:
+        return None
+    ordered = sorted(values)
+    return ordered[min(len(ordered) - 1, max(0, round(pct / 100 * len(ordered)) - 1))]
+
+
+def fake_clients(service, name="fake", **overrides):
+    """Build the OciClients of a fake tenancy, running on the simulated clock of the service.
+
+    The rate limiter and launch pacer keep simulated timestamps, so every target gets its own.
+
+    Args:
+        service (fake_oci.FakeOciService): The fake tenancy.
+        name (str, optional): Name of the target in the logs. Defaults to 'fake'.
+        **overrides: SDK clients replacing the fake ones, keyed like the OciClients arguments.
+
+    Returns:
+        hunt.OciClients: The clients of the fake tenancy.
+    """
+    sdk_clients = dict(iam=fake_oci.FakeIdentityClient(service),
+                       network=fake_oci.FakeVirtualNetworkClient(service),
+                       compute=fake_oci.FakeComputeClient(service),
+                       work_requests=fake_oci.FakeWorkRequestClient(service),
+                       limits=fake_oci.FakeLimitsClient(service))
+    sdk_clients.update(overrides)
+    return hunt.OciClients(dict(service.config), name=name, clock=service.clock,
+                           limiter=RateLimiter(service.clock),
+                           pacer=LaunchPacer(launch_pacer.min_interval, service.clock), **sdk_clients)
+
+
+def run_once(scenario, seed, workdir):
+    """Hunt one instance in the fake tenancy.
+
+    Args:
+        scenario (dict): The fake_oci scenario.
+        seed (int): Seed of the service and of the scheduler's jitter.
+        workdir (str): Empty directory holding the state files of the run.
+
+    Returns:
+        dict: Outcome, timings, call and error counts of the run.
+    """
+    random.seed(seed)
+    clock = fake_oci.VirtualClock()
+    service = fake_oci.FakeOciService(scenario, clock, seed)
+    clients = fake_clients(service, name=f"benchmark-{seed}")
+    previous_cwd = os.getcwd()
+    os.chdir(workdir)
+    try:
+        outcome = "created" if hunt.launch_instance(clients) else "max_runtime"
+        # Background resizes of a fallback-size instance run on the simulated clock too
+        while hunt.resize_threads:
+            hunt.resize_threads.pop().join()
+    except Exception as err:
+        outcome = f"error: {err}"
+    finally:
+        os.chdir(previous_cwd)
+    elapsed = clock.monotonic()
+    return {
+        "seed": seed,
+        "outcome": outcome,
+        "elapsed_secs": round(elapsed, 1),
+        "time_to_first_success_secs": (None if service.first_success_at is None
+                                       else round(service.first_success_at, 1)),
+        "launch_attempts": service.launch_attempts,
+        "attempts_per_min": round(service.launch_attempts / (elapsed / 60), 2) if elapsed else 0.0,
+        "api_calls": sum(service.calls.values()),
+        "calls": service.calls,
+        "errors": service.errors,
+    }
+
+
+def summarize(scenario_name, runs):
+    """Aggregate the runs of one scenario.
+
+    Args:
+        scenario_name (str): Name of the scenario.
+        runs (list): Results of run_once().
+
+    Returns:
+        dict: The summary.
+    """
+    successes = [run for run in runs if run["outcome"] == "created"]
+    ttfs = [run["time_to_first_success_secs"] for run in successes]
+    errors = {}
+    for run in runs:
+        for code, count in run["errors"].items():
+            errors[code] = errors.get(code, 0) + count
+    return {
+        "scenario": scenario_name,
+        "runs": len(runs),
+        "successes": len(successes),
+        "failed_runs": sum(run["outcome"].startswith("error") for run in runs),
+        "ttfs_mean_secs": round(sum(ttfs) / len(ttfs), 1) if ttfs else None,
+        "ttfs_p50_secs": percentile(ttfs, 50),
+        "ttfs_p90_secs": percentile(ttfs, 90),
+        "attempts_per_min": round(sum(run["attempts_per_min"] for run in runs) / len(runs), 2),
+        "api_calls_per_success": (round(sum(run["api_calls"] for run in runs) / len(successes), 1)
+                                  if successes else None),
+        "errors": errors,
+    }
+
+
+def print_summary(summary):
+    """Print one scenario summary."""
+    print(f"\n📊 Scenario: {summary['scenario']}")
+    print(f"   Successes:             {summary['successes']}/{summary['runs']}"
+          f" ({summary['failed_runs']} runs ended with an unhandled error)")
+    print(f"   Time to first success: mean {summary['ttfs_mean_secs']}s, "
+          f"p50 {summary['ttfs_p50_secs']}s, p90 {summary['ttfs_p90_secs']}s")
+    print(f"   Launch attempts/min:   {summary['attempts_per_min']}")
+    print(f"   API calls per success: {summary['api_calls_per_success']}")
+    print(f"   Errors:                {summary['errors']}")
+
+
+def main_cli():
+    parser = argparse.ArgumentParser(description="Benchmark the launch loop against a fake OCI service.")
+    parser.add_argument("--scenario", action="append", choices=sorted(fake_oci.SCENARIOS),
+                        help="built-in scenario to run, can be repeated (default: steady)")
+    parser.add_argument("--scenario-file", help="JSON file with scenario values overriding the defaults")
+    parser.add_argument("--runs", type=int, default=10, help="simulated hunts per scenario (default: 10)")
+    parser.add_argument("--seed", type=int, default=1, help="seed of the first run (default: 1)")
+    parser.add_argument("--max-runtime", type=int, default=21500,
+                        help="simulated MAX_RUNTIME_SECS of each hunt (default: 21500, as in the workflow)")
+    parser.add_argument("--env-file", help="load tuning variables from an env file such as oci.env first")
+    parser.add_argument("--set", action="append", default=[], metavar="KEY=VALUE",
+                        help="override a setting of the script, e.g. REQUEST_WAIT_TIME_SECS=30")
+    parser.add_argument("--json", help="write the summaries and every run to this file")
+    parser.add_argument("--verbose", action="store_true", help="print the launch logs")
+    args = parser.parse_args()
+
+    if args.env_file:
+        load_dotenv(args.env_file)
+    os.environ.update(BENCHMARK_ENV)
+    os.environ["MAX_RUNTIME_SECS"] = str(args.max_runtime)
+    for assignment in args.set:
+        key, sep, value = assignment.partition("=")
+        if not sep:
+            parser.error(f"--set expects KEY=VALUE, got {assignment!r}")
+        os.environ[key.strip()] = value.strip()
+    settings.load_settings()
+
+    logging.basicConfig(level=logging.INFO, format="%(asctime)s - %(levelname)s - %(message)s",
+                        handlers=[logging.StreamHandler() if args.verbose else logging.NullHandler()])
+
+    scenarios = []
+    if args.scenario_file:
+        with open(args.scenario_file, "r", encoding="utf-8") as scenario_file:
+            overrides = json.load(scenario_file)
+        scenarios.append(fake_oci.load_scenario(overrides.pop("base", None), overrides))
+    for name in args.scenario or ([] if scenarios else ["steady"]):
+        scenarios.append(fake_oci.load_scenario(name))
+
+    print(f"⚙️  REQUEST_WAIT_TIME_SECS={settings.WAIT_TIME} CAPACITY_RETRY_SECS={settings.CAPACITY_RETRY_SECS} "
+          f"RACE_ALL_ADS={settings.RACE_ALL_ADS} MIN_LAUNCH_INTERVAL_SECS={settings.MIN_LAUNCH_INTERVAL_SECS}")
+    report = []
+    with tempfile.TemporaryDirectory(prefix="oci-benchmark-") as tmp:
+        public_key = os.path.join(tmp, "id_rsa.pub")
+        hunt.write_into_file(public_key, "ssh-rsa AAAAB3NzaC1yc2EAAAADAQABAAABAQCbenchmark benchmark")
+        settings.SSH_AUTHORIZED_KEYS_FILE = public_key
+        template = os.path.join(os.path.dirname(os.path.abspath(__file__)), "email_content.html")
+        for scenario in scenarios:
+            runs = []
+            for seed in range(args.seed, args.seed + args.runs):
+                workdir = os.path.join(tmp, f"{scenario['name']}-{seed}")
+                os.makedirs(workdir)
+                shutil.copy(template, workdir)
+                runs.append(run_once(scenario, seed, workdir))
+            summary = summarize(scenario["name"], runs)
+            print_summary(summary)
+            report.append({"summary": summary, "scenario": scenario, "runs": runs})
+
+    if args.json:
+        with open(args.json, "w", encoding="utf-8") as json_file:
+            json.dump(report, json_file, indent=2)
+        print(f"\n📝 Results written to {args.json}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main_cli())
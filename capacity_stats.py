@@ -0,0 +1,183 @@
+#!/usr/bin/env python3
+"""
+Capacity Statistics
+Analyses the launch attempt history that main.py appends to CAPACITY_DB_FILE and reports the
+capacity-hit probability by AD, UTC hour and weekday, plus a recommended AD order (OCT_FREE_AD)
+and cron schedule for the GitHub Actions workflow.
+
+Examples:
+    python capacity_stats.py
+    python capacity_stats.py --region us-ashburn-1 --days 30 --runs-per-day 2
+    python capacity_stats.py --json stats.json
+"""
+
+import argparse
+import json
+import os
+import sqlite3
+import sys
+import time
+
+WEEKDAYS = ["Mon", "Tue", "Wed", "Thu", "Fri", "Sat", "Sun"]
+
+# Only answers about capacity count: throttling and other errors say nothing about it
+CAPACITY_OUTCOMES = ("success", "capacity")
+
+
+def hit_rate(hits, tries, prior_hits=0.0, prior_tries=0.0):
+    """Capacity-hit probability, smoothed towards the overall rate when there are few tries."""
+    tries = tries + prior_tries
+    return (hits + prior_hits) / tries if tries else 0.0
+
+
+def load_groups(db, column, where, params):
+    """Return {group: (hits, tries)} for the attempts matching the filter.
+
+    Args:
+        db (sqlite3.Connection): The history database.
+        column (str): SQL expression to group by.
+        where (str): SQL filter.
+        params (list): Parameters of the filter.
+
+    Returns:
+        dict: (hits, tries) per group value.
+    """
+    rows = db.execute(
+        f"SELECT {column} AS grp, SUM(outcome = 'success'), COUNT(*) FROM attempts "
+        f"WHERE {where} GROUP BY grp ORDER BY grp", params).fetchall()
+    return {grp: (hits, tries) for grp, hits, tries in rows}
+
+
+def recommend_start_hours(hourly, runs_per_day, run_hours):
+    """Greedily pick the run start hours covering the best capacity hours.
+
+    Args:
+        hourly (dict): Smoothed hit rate per UTC hour.
+        runs_per_day (int): Runs the schedule may start per day.
+        run_hours (int): Hours one run covers (MAX_RUNTIME_SECS).
+
+    Returns:
+        list: Sorted start hours.
+    """
+    covered, starts = set(), []
+    for _ in range(min(runs_per_day, 24)):
+        best = max((hour for hour in range(24) if hour not in starts),
+                   key=lambda start: (sum(hourly.get((start + offset) % 24, 0.0)
+                                          for offset in range(run_hours)
+                                          if (start + offset) % 24 not in covered), -start))
+        starts.append(best)
+        covered.update((best + offset) % 24 for offset in range(run_hours))
+    return sorted(starts)
+
+
+def analyse(db_path, region=None, shape=None, days=None, runs_per_day=4, run_hours=6):
+    """Compute the capacity statistics and recommendations.
+
+    Args:
+        db_path (str): Path of the SQLite history.
+        region (str, optional): Only use attempts of this region.
+        shape (str, optional): Only use attempts of this shape.
+        days (int, optional): Only use the attempts of the last N days.
+        runs_per_day (int): Runs the recommended schedule may start per day.
+        run_hours (int): Hours covered by one run.
+
+    Returns:
+        dict: The statistics, None when there is no usable history.
+    """
+    where, params = [f"outcome IN {CAPACITY_OUTCOMES}"], []
+    if region:
+        where.append("region = ?")
+        params.append(region)
+    if shape:
+        where.append("shape = ?")
+        params.append(shape)
+    if days:
+        where.append("ts >= ?")
+        params.append(int(time.time()) - days * 86400)
+    where = " AND ".join(where)
+
+    db = sqlite3.connect(db_path)
+    try:
+        total_hits, total_tries = db.execute(
+            f"SELECT COALESCE(SUM(outcome = 'success'), 0), COUNT(*) FROM attempts WHERE {where}",
+            params).fetchone()
+        if not total_tries:
+            return None
+        by_ad = load_groups(db, "ad", where, params)
+        by_hour = load_groups(db, "CAST(strftime('%H', ts, 'unixepoch') AS INTEGER)", where, params)
+        # SQLite weekdays start on Sunday, shift them to Monday = 0
+        by_weekday = load_groups(db, "(CAST(strftime('%w', ts, 'unixepoch') AS INTEGER) + 6) % 7", where, params)
+        first_ts, last_ts = db.execute(f"SELECT MIN(ts), MAX(ts) FROM attempts WHERE {where}", params).fetchone()
+    finally:
+        db.close()
+
+    overall = total_hits / total_tries
+    # One pseudo-attempt at the overall rate keeps sparse groups from looking perfect or hopeless
+    smooth = {"prior_hits": overall, "prior_tries": 1.0}
+    hourly = {hour: hit_rate(hits, tries, **smooth) for hour, (hits, tries) in by_hour.items()}
+    ad_order = sorted(by_ad, key=lambda ad: -hit_rate(*by_ad[ad], **smooth))
+    start_hours = recommend_start_hours(hourly, runs_per_day, run_hours)
+    return {
+        "attempts": total_tries,
+        "hits": total_hits,
+        "hit_rate": overall,
+        "from": time.strftime("%Y-%m-%d %H:%M", time.gmtime(first_ts)),
+        "to": time.strftime("%Y-%m-%d %H:%M", time.gmtime(last_ts)),
+        "by_ad": {ad: {"hits": hits, "tries": tries, "rate": hit_rate(hits, tries)}
+                  for ad, (hits, tries) in by_ad.items()},
+        "by_hour": {hour: {"hits": hits, "tries": tries, "rate": hit_rate(hits, tries)}
+                    for hour, (hits, tries) in by_hour.items()},
+        "by_weekday": {WEEKDAYS[day]: {"hits": hits, "tries": tries, "rate": hit_rate(hits, tries)}
+                       for day, (hits, tries) in by_weekday.items()},
+        "recommended_ad_order": ",".join("AD-" + ad.rsplit("AD-", 1)[-1] if "AD-" in ad else ad
+                                         for ad in ad_order),
+        "recommended_cron": f"0 {','.join(str(hour) for hour in start_hours)} * * *",
+    }
+
+
+def print_table(title, groups):
+    print(f"\n{title}")
+    for name, group in groups.items():
+        bar = "█" * round(group["rate"] * 40)
+        print(f"   {str(name):<28} {group['hits']:>6}/{group['tries']:<8} {group['rate']:7.2%} {bar}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Capacity-hit statistics of the launch attempt history.")
+    parser.add_argument("--db", default=os.getenv("CAPACITY_DB_FILE", "capacity_history.db").strip()
+                        or "capacity_history.db", help="SQLite history written by main.py")
+    parser.add_argument("--region", help="only analyse this region")
+    parser.add_argument("--shape", help="only analyse this shape")
+    parser.add_argument("--days", type=int, help="only analyse the last N days")
+    parser.add_argument("--runs-per-day", type=int, default=4,
+                        help="runs the recommended schedule may start per day (default: 4)")
+    parser.add_argument("--run-hours", type=int,
+                        default=max(1, round(int(os.getenv("MAX_RUNTIME_SECS", "21500") or "21500") / 3600)),
+                        help="hours one run lasts (default: MAX_RUNTIME_SECS, 6)")
+    parser.add_argument("--json", help="also write the statistics to this file")
+    args = parser.parse_args()
+
+    if not os.path.exists(args.db):
+        print(f"ℹ️  No capacity history found at {args.db} yet")
+        return 0
+    stats = analyse(args.db, args.region, args.shape, args.days, args.runs_per_day, args.run_hours)
+    if stats is None:
+        print(f"ℹ️  {args.db} has no capacity answers for this filter yet")
+        return 0
+
+    print(f"📈 {stats['attempts']} capacity answers from {stats['from']} to {stats['to']} UTC, "
+          f"{stats['hits']} hits ({stats['hit_rate']:.2%})")
+    print_table("By availability domain", stats["by_ad"])
+    print_table("By hour (UTC)", {f"{hour:02d}:00": group for hour, group in stats["by_hour"].items()})
+    print_table("By weekday (UTC)", stats["by_weekday"])
+    print(f"\n✅ Recommended OCT_FREE_AD: {stats['recommended_ad_order']}")
+    print(f"✅ Recommended cron ({args.runs_per_day} runs/day of {args.run_hours}h): "
+          f"'{stats['recommended_cron']}'")
+    if args.json:
+        with open(args.json, "w", encoding="utf-8") as json_file:
+            json.dump(stats, json_file, indent=2)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
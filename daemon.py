@@ -0,0 +1,279 @@
+"""
+Hunt Daemon
+Daemon mode (--daemon): hunt windows scheduled in-process, controlled through a Unix socket.
+"""
+
+import json
+import logging
+import os
+import signal
+import socket
+import socketserver
+import threading
+from datetime import datetime, timedelta, timezone
+
+from dotenv import dotenv_values
+
+import settings
+from deadline import hunt_stop, run_deadline_scope
+from fleet import run_hunt
+from hunt import get_default_clients, reset_default_clients
+from notifications import reset_notification_dispatcher, send_discord_message
+from rate_limiter import rate_limiter
+from settings import get_env_file_path, get_oci_config_path
+
+
+def reload_settings():
+    """Re-read oci.env and the OCI config in place (hot reload of the daemon).
+
+    Variables of the process environment keep precedence over oci.env, as on the first load.
+    The default clients, the notification backends and, if its limits changed, the rate
+    limiter are rebuilt on their next use.
+    """
+    base_environ = settings.startup_environ if settings.startup_environ is not None else {}
+    previous_limits = settings.OCI_RATE_LIMITS
+    env_values = dotenv_values(get_env_file_path())
+    for key in set(env_values) | {key for key in os.environ if key not in base_environ}:
+        if key in base_environ:
+            continue
+        if env_values.get(key) is not None:
+            os.environ[key] = env_values[key]
+        else:
+            os.environ.pop(key, None)
+    settings.load_settings()
+    settings.validate_config_file()
+    reset_default_clients()
+    if settings.OCI_RATE_LIMITS != previous_limits:
+        rate_limiter.reset()
+    reset_notification_dispatcher()
+
+
+def parse_schedule_hours(spec):
+    """Parse DAEMON_SCHEDULE_HOURS, e.g. '0,6,12,18'.
+
+    Args:
+        spec (str): Comma-separated UTC hours.
+
+    Returns:
+        list: The sorted hours.
+    """
+    hours = sorted({int(hour) for hour in spec.split(",") if hour.strip()})
+    if any(hour < 0 or hour > 23 for hour in hours):
+        raise ValueError(f"DAEMON_SCHEDULE_HOURS must be hours between 0 and 23, got {spec!r}")
+    return hours
+
+
+def send_control_command(command, socket_path=None, timeout=10.0):
+    """Send a command to a running daemon and return its JSON reply.
+
+    Args:
+        command (str): 'status', 'reload', 'hunt' or 'stop'.
+        socket_path (str, optional): The control socket. Defaults to DAEMON_CONTROL_SOCKET.
+        timeout (float, optional): Socket timeout in seconds.
+
+    Returns:
+        dict: The reply of the daemon.
+    """
+    with socket.socket(socket.AF_UNIX, socket.SOCK_STREAM) as sock:
+        sock.settimeout(timeout)
+        sock.connect(socket_path or settings.DAEMON_CONTROL_SOCKET)
+        sock.sendall(command.encode("utf-8") + b"\n")
+        reply = b""
+        while not reply.endswith(b"\n"):
+            chunk = sock.recv(4096)
+            if not chunk:
+                break
+            reply += chunk
+    return json.loads(reply.decode("utf-8"))
+
+
+class HuntDaemon:
+    """Long-running hunter that schedules its own hunt windows.
+
+    The OCI clients, their HTTP connections and the rate limiter stay warm between windows.
+    oci.env and the OCI config are polled for changes, which end the current window (its
+    checkpoint is resumed) and are hot-reloaded before the next one. A Unix socket answers the
+    'status', 'reload', 'hunt' (start the next window now) and 'stop' commands.
+    """
+
+    COMMANDS = ("status", "reload", "hunt", "stop")
+
+    def __init__(self, fleet_spec="", batch_spec=""):
+        self.fleet_spec = fleet_spec
+        self.batch_spec = batch_spec
+        self.stopping = threading.Event()
+        self.wakeup = threading.Event()
+        self.reload_requested = threading.Event()
+        self.hunt_requested = threading.Event()
+        self.status = {"pid": os.getpid(), "state": "starting",
+                       "started_at": datetime.now(timezone.utc).isoformat(), "windows": 0,
+                       "last_outcome": None, "window_started_at": None, "next_window_at": None, "reloads": 0}
+        self._server = None
+
+    def request_stop(self):
+        self.stopping.set()
+        hunt_stop.set()
+        self.wakeup.set()
+
+    def request_reload(self):
+        self.reload_requested.set()
+        hunt_stop.set()
+        self.wakeup.set()
+
+    def request_hunt(self):
+        self.hunt_requested.set()
+        self.wakeup.set()
+
+    def handle_command(self, command):
+        """Execute a control command.
+
+        Args:
+            command (str): One of COMMANDS.
+
+        Returns:
+            dict: The reply sent back on the socket.
+        """
+        if command == "status":
+            return dict(self.status, ok=True)
+        if command == "reload":
+            self.request_reload()
+        elif command == "hunt":
+            self.request_hunt()
+        elif command == "stop":
+            self.request_stop()
+        else:
+            return {"ok": False, "error": f"unknown command {command!r}", "commands": list(self.COMMANDS)}
+        return {"ok": True, "command": command}
+
+    def _watched_mtimes(self):
+        mtimes = {}
+        for path in (get_env_file_path(), get_oci_config_path()):
+            try:
+                mtimes[path] = os.stat(path).st_mtime_ns
+            except OSError:
+                mtimes[path] = None
+        return mtimes
+
+    def _watch_files(self):
+        snapshot = self._watched_mtimes()
+        while not self.stopping.wait(settings.DAEMON_WATCH_INTERVAL_SECS):
+            current = self._watched_mtimes()
+            if current != snapshot:
+                snapshot = current
+                logging.info("🔄 Configuration changed, reloading")
+                self.request_reload()
+
+    def _start_control_server(self):
+        if not settings.DAEMON_CONTROL_SOCKET:
+            return
+        if not hasattr(socket, "AF_UNIX"):
+            logging.warning("Unix sockets are not available, the daemon control socket is disabled")
+            return
+        if os.path.exists(settings.DAEMON_CONTROL_SOCKET):
+            try:
+                send_control_command("status", timeout=2)
+            except (OSError, ValueError):
+                os.remove(settings.DAEMON_CONTROL_SOCKET)  # left over by a daemon that died
+            else:
+                raise RuntimeError(f"Another daemon is already listening on {settings.DAEMON_CONTROL_SOCKET}")
+        daemon = self
+
+        class ControlHandler(socketserver.StreamRequestHandler):
+            def handle(self):
+                command = self.rfile.readline().decode("utf-8", "replace").strip().lower()
+                self.wfile.write((json.dumps(daemon.handle_command(command)) + "\n").encode("utf-8"))
+
+        self._server = socketserver.ThreadingUnixStreamServer(settings.DAEMON_CONTROL_SOCKET, ControlHandler)
+        os.chmod(settings.DAEMON_CONTROL_SOCKET, 0o600)
+        threading.Thread(target=self._server.serve_forever, name="daemon-control", daemon=True).start()
+        logging.info("🎛️ Daemon control socket listening on %s", settings.DAEMON_CONTROL_SOCKET)
+
+    def next_window_delay(self):
+        """Seconds until the next hunt window starts (0 if it should start now)."""
+        hours = parse_schedule_hours(settings.DAEMON_SCHEDULE_HOURS)
+        if not hours:
+            return settings.DAEMON_PAUSE_SECS if self.status["windows"] else 0.0
+        now = datetime.now(timezone.utc)
+        today = now.replace(minute=0, second=0, microsecond=0)
+        delays = []
+        for day in (-1, 0, 1):
+            for hour in hours:
+                start = today.replace(hour=hour) + timedelta(days=day)
+                if start + timedelta(seconds=settings.DAEMON_WINDOW_SECS - 60) > now:
+                    delays.append((start - now).total_seconds())
+        return max(0.0, min(delays))
+
+    def _run_window(self):
+        hunt_stop.clear()
+        window_secs = settings.DAEMON_WINDOW_SECS
+        if settings.DAEMON_SCHEDULE_HOURS:
+            # A window entered late only lasts until its scheduled end, a manual one lasts a full window
+            remaining = settings.DAEMON_WINDOW_SECS - self._window_lateness()
+            if remaining > 60:
+                window_secs = int(remaining)
+        self.status.update(state="hunting", window_started_at=datetime.now(timezone.utc).isoformat(),
+                           next_window_at=None)
+        self.status["windows"] += 1
+        logging.info("🏹 Daemon hunt window %d started (%ss)", self.status["windows"], window_secs)
+        try:
+            # The window deadline replaces MAX_RUNTIME_SECS for the hunt
+            with run_deadline_scope(window_secs):
+                created = run_hunt(self.fleet_spec, self.batch_spec)
+        except Exception as err:
+            logging.exception("Daemon hunt window failed")
+            send_discord_message(f"😱 Daemon hunt window failed:\n{err}")
+            self.status["last_outcome"] = f"error: {err}"
+            self.stopping.wait(60)
+            return False
+        self.status["last_outcome"] = ("created" if created else
+                                       "stopped" if hunt_stop.is_set() else "max_runtime")
+        return created
+
+    def _window_lateness(self):
+        now = datetime.now(timezone.utc)
+        starts = [now.replace(hour=hour, minute=0, second=0, microsecond=0) - timedelta(days=day)
+                  for hour in parse_schedule_hours(settings.DAEMON_SCHEDULE_HOURS) for day in (0, 1)]
+        return min((now - start).total_seconds() for start in starts if start <= now)
+
+    def run(self):
+        """Run hunt windows until an instance exists or a stop is requested.
+
+        Returns:
+            bool: True if an instance was created (or already exists).
+        """
+        self._start_control_server()
+        threading.Thread(target=self._watch_files, name="daemon-watch", daemon=True).start()
+        signal.signal(signal.SIGTERM, lambda *_: self.request_stop())
+        signal.signal(signal.SIGINT, lambda *_: self.request_stop())
+        if hasattr(signal, "SIGHUP"):
+            signal.signal(signal.SIGHUP, lambda *_: self.request_reload())
+        created = False
+        try:
+            get_default_clients()
+            while not self.stopping.is_set():
+                if self.reload_requested.is_set():
+                    self.reload_requested.clear()
+                    reload_settings()
+                    self.status["reloads"] += 1
+                    logging.info("✅ Configuration reloaded")
+                self.wakeup.clear()
+                if self.stopping.is_set() or self.reload_requested.is_set():
+                    continue
+                delay = 0.0 if self.hunt_requested.is_set() else self.next_window_delay()
+                if delay > 0:
+                    self.status.update(state="waiting", next_window_at=(
+                        datetime.now(timezone.utc) + timedelta(seconds=delay)).isoformat())
+                    if self.wakeup.wait(delay) and not self.hunt_requested.is_set():
+                        continue
+                self.hunt_requested.clear()
+                created = self._run_window()
+                if created:
+                    break
+        finally:
+            self.status["state"] = "stopped"
+            if self._server is not None:
+                self._server.shutdown()
+                self._server.server_close()
+                if os.path.exists(settings.DAEMON_CONTROL_SOCKET):
+                    os.remove(settings.DAEMON_CONTROL_SOCKET)
+        return created
@@ -0,0 +1,127 @@
+"""
+Run Deadline
+The run deadline (MAX_RUNTIME_SECS or a daemon window) that bounds every sleep, retry loop
+and HTTP timeout of a hunt, and the hunt_stop event that ends running hunts early.
+"""
+
+import contextlib
+import contextvars
+import functools
+import threading
+import time
+
+import settings
+
+
+# Set to end running hunts early (daemon stop/reload); launch_instance() saves its checkpoint and returns
+hunt_stop = threading.Event()
+
+
+class RunDeadlineExceeded(Exception):
+    """Raised by a blocking call that would run past the run deadline (see run_deadline_scope)."""
+
+
+# clock.monotonic() by which the current run must wrap up, None outside of a run_deadline_scope().
+# A context variable, so that the concurrent hunts of a fleet or batch each keep their own deadline.
+run_deadline = contextvars.ContextVar("run_deadline", default=None)
+# The clock the run deadline is measured on: the time module, or the simulated clock of the
+# OciClients of the run (see OciClients.clock)
+run_clock = contextvars.ContextVar("run_clock", default=time)
+
+
+@contextlib.contextmanager
+def run_deadline_scope(secs, started=None, clock=None):
+    """Bound every sleep, retry loop and HTTP timeout of the enclosed run to secs seconds.
+
+    A nested scope never extends the deadline of the scope around it.
+
+    Args:
+        secs (float): The runtime budget (MAX_RUNTIME_SECS), 0 for no deadline.
+        started (float, optional): clock.monotonic() the budget counts from. Defaults to now.
+        clock (module, optional): The clock of the run. Defaults to the one of the scope around it.
+
+    Yields:
+        float: The deadline of the scope, None if there is none.
+    """
+    clock = clock or run_clock.get()
+    deadline = run_deadline.get()
+    if secs:
+        started = clock.monotonic() if started is None else started
+        deadline = min(float("inf") if deadline is None else deadline, started + secs)
+    token = run_deadline.set(deadline)
+    clock_token = run_clock.set(clock)
+    try:
+        yield deadline
+    finally:
+        run_clock.reset(clock_token)
+        run_deadline.reset(token)
+
+
+def max_runtime_scope(started=None, clock=None):
+    """run_deadline_scope() of MAX_RUNTIME_SECS, unless the caller already set the run deadline.
+
+    A daemon hunt window sets its own deadline, which then replaces MAX_RUNTIME_SECS.
+
+    Args:
+        started (float, optional): clock.monotonic() the budget counts from. Defaults to now.
+        clock (module, optional): The clock of the run. Defaults to the one of the scope around it.
+
+    Returns:
+        contextlib.AbstractContextManager: The scope, yielding the deadline of the run.
+    """
+    return run_deadline_scope(settings.MAX_RUNTIME_SECS if run_deadline.get() is None else 0, started, clock)
+
+
+def bind_run_deadline(func, deadline=None):
+    """Wrap func to run under a run deadline (and its clock) in whichever thread calls it.
+
+    Worker threads do not inherit the deadline of the thread that hands them work.
+
+    Args:
+        func (callable): The function to wrap.
+        deadline (float, optional): The deadline to run under. Defaults to the one of the calling thread.
+
+    Returns:
+        callable: The wrapped function.
+    """
+    deadline = run_deadline.get() if deadline is None else deadline
+    clock = run_clock.get()
+
+    @functools.wraps(func)
+    def bound(*args, **kwargs):
+        token = run_deadline.set(deadline)
+        clock_token = run_clock.set(clock)
+        try:
+            return func(*args, **kwargs)
+        finally:
+            run_clock.reset(clock_token)
+            run_deadline.reset(token)
+    return bound
+
+
+def remaining_runtime():
+    """Seconds left until the run deadline of the current thread, infinite without one."""
+    deadline = run_deadline.get()
+    return float("inf") if deadline is None else max(0.0, deadline - run_clock.get().monotonic())
+
+
+def check_run_deadline(wait_secs=0.0):
+    """Raise RunDeadlineExceeded if the run deadline passes within wait_secs."""
+    if remaining_runtime() <= wait_secs:
+        raise RunDeadlineExceeded(f"Max runtime ({settings.MAX_RUNTIME_SECS}s) reached")
+
+
+def interruptible_sleep(secs, step=1.0):
+    """Sleep up to secs, returning early once hunt_stop is set or the run deadline is reached.
+
+    Args:
+        secs (float): Seconds to sleep.
+        step (float, optional): Granularity at which hunt_stop is checked.
+    """
+    clock = run_clock.get()
+    deadline = clock.monotonic() + min(secs, remaining_runtime())
+    while not hunt_stop.is_set():
+        remaining = deadline - clock.monotonic()
+        if remaining <= 0:
+            return
+        clock.sleep(min(remaining, step))
@@ -0,0 +1,410 @@
+#!/usr/bin/env python3
+"""
+Fake OCI Service
+A local stand-in for the Compute (including capacity reports), Identity, Virtual Network, Work
+Request and Limits calls made by main.py. It replays capacity windows, throttling, 502s and API latency
+on a simulated clock, so the launch loop can be benchmarked (see benchmark.py) without a live tenancy.
+"""
+
+import math
+import random
+import threading
+import time
+
+import oci
+
+TENANCY_ID = "ocid1.tenancy.oc1..fake"
+SUBNET_ID = "ocid1.subnet.oc1..fake"
+IMAGE_ID = "ocid1.image.oc1..fake-ubuntu-22.04"
+
+# Built-in scenarios, times in (simulated) seconds. Each AD gets a capacity window about every
+# `capacity_every` seconds lasting `capacity_window` seconds, during which a launch succeeds with
+# probability `window_success_prob`. Any call fails with 429 at `throttle_rate` or 502 at
+# `bad_gateway_rate`, and launches beyond `launch_rate_limit_per_min` get a 429 with Retry-After.
+# Outside the windows, an A1 launch below the full 4 OCPUs still fits on a fragmented host with
+# probability `fragment_success_prob`. The response of a successful launch is lost (a client read
+# timeout) at `lost_response_rate`; a resend with the same opc-retry-token gets the same instance.
+DEFAULT_SCENARIO = {
+    "region": "us-ashburn-1",
+    "ads": 3,
+    "capacity_every": [1800, 1800, 1800],
+    "capacity_window": 120,
+    "window_success_prob": 0.5,
+    "throttle_rate": 0.01,
+    "bad_gateway_rate": 0.005,
+    "launch_rate_limit_per_min": 20,
+    "retry_after_secs": 10,
+    "latency": {"median": 0.3, "sigma": 0.5},
+    "launch_latency": {"median": 1.5, "sigma": 0.4},
+    "provision_secs": 30,
+    "fragment_success_prob": 0.0,
+    "lost_response_rate": 0.0,
+    "limits": {"standard-a1-core-count": 4, "standard-a1-memory-count": 24, "vm-standard-e2-1-micro-count": 2},
+}
+
+SCENARIOS = {
+    "steady": {},
+    "skewed": {"capacity_every": [7200, 1200, 7200]},
+    "scarce": {"capacity_every": [14400, 14400, 14400], "capacity_window": 60},
+    "throttled": {"throttle_rate": 0.05, "launch_rate_limit_per_min": 6},
+    "flaky": {"bad_gateway_rate": 0.05, "latency": {"median": 0.5, "sigma": 1.0},
+              "launch_latency": {"median": 3.0, "sigma": 1.0}, "lost_response_rate": 0.2},
+    "single-ad": {"ads": 1, "capacity_every": [1800]},
+    "fragmented": {"capacity_every": [7200, 7200, 7200], "fragment_success_prob": 0.02},
+}
+
+
+def load_scenario(name=None, overrides=None):
+    """Build a scenario from the defaults, a built-in scenario and explicit overrides.
+
+    Args:
+        name (str, optional): A key of SCENARIOS. Defaults to "steady".
+        overrides (dict, optional): Values replacing those of the scenario (e.g. from a JSON file).
+
+    Returns:
+        dict: The complete scenario.
+    """
+    name = name or "steady"
+    if name not in SCENARIOS:
+        raise ValueError(f"Unknown scenario {name!r}, expected one of {sorted(SCENARIOS)}")
+    scenario = dict(DEFAULT_SCENARIO, **SCENARIOS[name], **(overrides or {}))
+    scenario.setdefault("name", name)
+    every = list(scenario["capacity_every"])
+    scenario["capacity_every"] = (every + every[-1:] * scenario["ads"])[:scenario["ads"]]
+    return scenario
+
+
+class VirtualClock:
+    """Simulated replacement for the `time` module, sleeping returns immediately.
+
+    Time advances only through sleep(). Threads other than the one that created the clock
+    (the workers of a launch race) run in parallel: their sleeps advance a per-thread offset,
+    and the owner thread jumps ahead by the longest offset when it next reads the clock.
+    """
+
+    def __init__(self, start=0.0, wall_start=1_700_000_000.0):
+        self._now = start
+        self._wall_offset = wall_start - start
+        self._owner = threading.get_ident()
+        self._lock = threading.Lock()
+        self._epoch = 0
+        self._pending = 0.0
+        self._local = threading.local()
+
+    def _worker_offset(self):
+        local = self._local
+        if getattr(local, "epoch", None) != self._epoch:
+            local.epoch, local.offset = self._epoch, 0.0
+        return local
+
+    def monotonic(self):
+        with self._lock:
+            if threading.get_ident() == self._owner:
+                if self._pending:
+                    self._now += self._pending
+                    self._pending = 0.0
+                    self._epoch += 1
+                return self._now
+            return self._now + self._worker_offset().offset
+
+    def sleep(self, secs):
+        secs = max(0.0, secs)
+        with self._lock:
+            if threading.get_ident() == self._owner:
+                self._now += self._pending + secs
+                if self._pending:
+                    self._pending = 0.0
+                    self._epoch += 1
+                return
+            local = self._worker_offset()
+            local.offset += secs
+            self._pending = max(self._pending, local.offset)
+
+    def time(self):
+        return self._wall_offset + self.monotonic()
+
+    def __getattr__(self, name):
+        # perf_counter, strftime, ... come from the real time module
+        return getattr(time, name)
+
+
+class FakeOciService:
+    """Shared state of the fake tenancy: capacity, instances and call statistics."""
+
+    def __init__(self, scenario=None, clock=None, seed=None):
+        self.scenario = scenario or load_scenario()
+        self.clock = clock or VirtualClock()
+        self.region = self.scenario["region"]
+        self.ad_names = [f"Fake:{self.region.upper()}-AD-{i + 1}" for i in range(self.scenario["ads"])]
+        self.config = {"tenancy": TENANCY_ID, "region": self.region}
+        self._random = random.Random(seed)
+        self._lock = threading.RLock()
+        self._windows = {ad: [] for ad in self.ad_names}
+        self._next_window = {ad: 0.0 for ad in self.ad_names}
+        self._recent_launches = []
+        self.instances = {}
+        self.work_requests = {}
+        self.retry_tokens = {}
+        self.calls = {}
+        self.errors = {}
+        self.launch_attempts = 0
+        self._request_count = 0
+        self.first_success_at = None
+
+    def _lognormal(self, params):
+        return self._random.lognormvariate(math.log(params["median"]), params["sigma"])
+
+    def _capacity_open(self, ad_name, now):
+        every = self.scenario["capacity_every"][self.ad_names.index(ad_name)]
+        windows = self._windows[ad_name]
+        while self._next_window[ad_name] <= now:
+            start = self._next_window[ad_name] + self._random.expovariate(1.0 / every)
+            windows.append((start, start + self.scenario["capacity_window"]))
+            self._next_window[ad_name] = start
+        return any(start <= now < end for start, end in windows)
+
+    def _has_room(self, ad_name, shape_config, now, window_prob=None):
+        window_prob = self.scenario["window_success_prob"] if window_prob is None else window_prob
+        if self._capacity_open(ad_name, now) and self._random.random() < window_prob:
+            return True
+        fragment = shape_config is not None and shape_config.ocpus is not None and shape_config.ocpus < 4
+        return fragment and self._random.random() < self.scenario["fragment_success_prob"]
+
+    def _headers(self, headers=None):
+        self._request_count += 1
+        return dict(headers or {}, **{"opc-request-id": f"fake/{self._request_count:08d}"})
+
+    def _error(self, status, code, message, headers=None):
+        self.errors[code] = self.errors.get(code, 0) + 1
+        return oci.exceptions.ServiceError(status, code, self._headers(headers), message)
+
+    def call(self, method, latency=None):
+        """Account for one API call: sleep its latency and inject throttling/502 failures.
+
+        Args:
+            method (str): Name of the SDK method.
+            latency (dict, optional): Lognormal latency parameters. Defaults to the scenario's.
+
+        Raises:
+            oci.exceptions.ServiceError: A randomly injected 429 or 502.
+        """
+        with self._lock:
+            self.calls[method] = self.calls.get(method, 0) + 1
+            delay = self._lognormal(latency or self.scenario["latency"])
+            roll = self._random.random()
+        self.clock.sleep(delay)
+        with self._lock:
+            if roll < self.scenario["throttle_rate"]:
+                raise self._error(429, "TooManyRequests", "Too many requests for the tenant")
+            if roll < self.scenario["throttle_rate"] + self.scenario["bad_gateway_rate"]:
+                raise self._error(502, "BadGateway", "Bad Gateway")
+
+    def response(self, data, status=200, headers=None):
+        with self._lock:
+            return oci.response.Response(status, self._headers(headers), data, None)
+
+    def launch(self, details, retry_token=None):
+        """Handle a LaunchInstance request against the capacity of its AD."""
+        self.call("launch_instance", self.scenario["launch_latency"])
+        now = self.clock.monotonic()
+        with self._lock:
+            if retry_token in self.retry_tokens:
+                return self.retry_tokens[retry_token]
+            self.launch_attempts += 1
+            self._recent_launches = [t for t in self._recent_launches if now - t < 60] + [now]
+            if len(self._recent_launches) > self.scenario["launch_rate_limit_per_min"]:
+                raise self._error(429, "TooManyRequests", "Too many requests for the tenant",
+                                  {"retry-after": str(self.scenario["retry_after_secs"])})
+            if details.availability_domain not in self._windows:
+                raise self._error(404, "NotAuthorizedOrNotFound", "Availability domain not found")
+            if not self._has_room(details.availability_domain, details.shape_config, now):
+                raise self._error(500, "InternalError", "Out of host capacity.")
+            instance = oci.core.models.Instance(
+                id=f"ocid1.instance.oc1..fake{len(self.instances) + 1}",
+                display_name=details.display_name,
+                availability_domain=details.availability_domain,
+                compartment_id=details.compartment_id,
+                shape=details.shape,
+                shape_config=details.shape_config and oci.core.models.InstanceShapeConfig(
+                    ocpus=details.shape_config.ocpus, memory_in_gbs=details.shape_config.memory_in_gbs),
+                region=self.region,
+                lifecycle_state="PROVISIONING",
+            )
+            instance.launched_at = now
+            instance.work_request_id = f"ocid1.coreservicesworkrequest.oc1..fake{len(self.instances) + 1}"
+            self.instances[instance.id] = instance
+            self.work_requests[instance.work_request_id] = instance
+            if self.first_success_at is None:
+                self.first_success_at = now
+            if retry_token:
+                self.retry_tokens[retry_token] = instance
+            if self._random.random() < self.scenario["lost_response_rate"]:
+                self.errors["LostResponse"] = self.errors.get("LostResponse", 0) + 1
+                raise oci.exceptions.RequestException("Read timed out")
+            return instance
+
+    def resize(self, instance_id, details):
+        """Handle an UpdateInstance request resizing an instance on its host."""
+        self.call("update_instance")
+        now = self.clock.monotonic()
+        with self._lock:
+            instance = self.instances.get(instance_id)
+            if instance is None:
+                raise self._error(404, "NotAuthorizedOrNotFound", "Instance not found")
+            if not self._has_room(instance.availability_domain, details.shape_config, now):
+                raise self._error(500, "InternalError", "Out of host capacity.")
+            instance.shape_config = oci.core.models.InstanceShapeConfig(
+                ocpus=details.shape_config.ocpus, memory_in_gbs=details.shape_config.memory_in_gbs)
+            return instance
+
+    def capacity_report(self, details):
+        """Handle a CreateComputeCapacityReport request: room while the AD has a capacity window."""
+        self.call("create_compute_capacity_report")
+        now = self.clock.monotonic()
+        with self._lock:
+            if details.availability_domain not in self._windows:
+                raise self._error(404, "NotAuthorizedOrNotFound", "Availability domain not found")
+            availabilities = []
+            for requested in details.shape_availabilities:
+                room = self._has_room(details.availability_domain, requested.instance_shape_config, now, 1.0)
+                availabilities.append(oci.core.models.CapacityReportShapeAvailability(
+                    instance_shape=requested.instance_shape, instance_shape_config=requested.instance_shape_config,
+                    available_count=1 if room else 0,
+                    availability_status="AVAILABLE" if room else "OUT_OF_HOST_CAPACITY"))
+            return oci.core.models.ComputeCapacityReport(
+                compartment_id=details.compartment_id, availability_domain=details.availability_domain,
+                shape_availabilities=availabilities)
+
+    def limit_usage(self, limit_name):
+        """Usage of a regional compute limit by the instances that aren't terminated."""
+        with self._lock:
+            instances = [instance for instance in self.instances.values() if instance.lifecycle_state != "TERMINATED"]
+        arm = [instance.shape_config for instance in instances
+               if instance.shape == "VM.Standard.A1.Flex" and instance.shape_config]
+        if limit_name == "standard-a1-core-count":
+            return sum(shape_config.ocpus for shape_config in arm)
+        if limit_name == "standard-a1-memory-count":
+            return sum(shape_config.memory_in_gbs for shape_config in arm)
+        if limit_name == "vm-standard-e2-1-micro-count":
+            return sum(instance.shape == "VM.Standard.E2.1.Micro" for instance in instances)
+        return 0
+
+    def refresh(self, instance):
+        """Move an instance to RUNNING once its provisioning time has passed."""
+        if (instance.lifecycle_state == "PROVISIONING"
+                and self.clock.monotonic() - instance.launched_at >= self.scenario["provision_secs"]):
+            instance.lifecycle_state = "RUNNING"
+        return instance
+
+
+class FakeComputeClient:
+    """The subset of oci.core.ComputeClient used by main.py."""
+
+    def __init__(self, service):
+        self.service = service
+
+    def launch_instance(self, launch_instance_details, opc_retry_token=None, **kwargs):
+        instance = self.service.launch(launch_instance_details, opc_retry_token)
+        return self.service.response(instance, headers={"opc-work-request-id": instance.work_request_id})
+
+    def get_instance(self, instance_id, **kwargs):
+        self.service.call("get_instance")
+        instance = self.service.instances.get(instance_id)
+        if instance is None:
+            raise self.service._error(404, "NotAuthorizedOrNotFound", "Instance not found")
+        return self.service.response(self.service.refresh(instance))
+
+    def list_instances(self, compartment_id, **kwargs):
+        self.service.call("list_instances")
+        instances = [self.service.refresh(instance) for instance in list(self.service.instances.values())]
+        filters = {key: kwargs[key] for key in ("lifecycle_state", "display_name", "availability_domain")
+                   if kwargs.get(key)}
+        return self.service.response([instance for instance in instances
+                                      if all(getattr(instance, key) == value for key, value in filters.items())])
+
+    def create_compute_capacity_report(self, create_compute_capacity_report_details, **kwargs):
+        return self.service.response(self.service.capacity_report(create_compute_capacity_report_details))
+
+    def update_instance(self, instance_id, update_instance_details, **kwargs):
+        return self.service.response(self.service.resize(instance_id, update_instance_details))
+
+    def terminate_instance(self, instance_id, **kwargs):
+        self.service.call("terminate_instance")
+        instance = self.service.instances.get(instance_id)
+        if instance is not None:
+            instance.lifecycle_state = "TERMINATED"
+        return self.service.response(None, status=204)
+
+    def list_images(self, compartment_id, **kwargs):
+        self.service.call("list_images")
+        image = oci.core.models.Image(id=IMAGE_ID, display_name="Canonical-Ubuntu-22.04-aarch64-fake",
+                                      operating_system="Canonical Ubuntu", operating_system_version="22.04",
+                                      lifecycle_state="AVAILABLE", size_in_mbs=47694)
+        return self.service.response([image])
+
+
+class FakeIdentityClient:
+    """The subset of oci.identity.IdentityClient used by main.py."""
+
+    def __init__(self, service):
+        self.service = service
+
+    def list_availability_domains(self, compartment_id, **kwargs):
+        self.service.call("list_availability_domains")
+        return self.service.response([oci.identity.models.AvailabilityDomain(name=name, compartment_id=compartment_id)
+                                      for name in self.service.ad_names])
+
+
+class FakeVirtualNetworkClient:
+    """The subset of oci.core.VirtualNetworkClient used by main.py."""
+
+    def __init__(self, service):
+        self.service = service
+
+    def list_subnets(self, compartment_id, **kwargs):
+        self.service.call("list_subnets")
+        return self.service.response([oci.core.models.Subnet(id=SUBNET_ID, compartment_id=compartment_id)])
+
+
+class FakeWorkRequestClient:
+    """The subset of oci.work_requests.WorkRequestClient used by main.py."""
+
+    def __init__(self, service):
+        self.service = service
+
+    def get_work_request(self, work_request_id, **kwargs):
+        self.service.call("get_work_request")
+        instance = self.service.work_requests.get(work_request_id)
+        if instance is None:
+            raise self.service._error(404, "NotAuthorizedOrNotFound", "Work request not found")
+        running = self.service.refresh(instance).lifecycle_state == "PROVISIONING"
+        return self.service.response(oci.work_requests.models.WorkRequest(
+            id=work_request_id, operation_type="LaunchInstance", status="IN_PROGRESS" if running else "SUCCEEDED",
+            percent_complete=50.0 if running else 100.0))
+
+    def list_work_request_errors(self, work_request_id, **kwargs):
+        self.service.call("list_work_request_errors")
+        return self.service.response([])
+
+
+class FakeLimitsClient:
+    """The subset of oci.limits.LimitsClient used by main.py, with regional limits from the scenario."""
+
+    def __init__(self, service):
+        self.service = service
+
+    def list_limit_values(self, compartment_id, service_name, **kwargs):
+        self.service.call("list_limit_values")
+        limits = self.service.scenario["limits"]
+        return self.service.response([oci.limits.models.LimitValueSummary(name=name, scope_type="REGION", value=value)
+                                      for name, value in limits.items() if kwargs.get("name") in (None, name)])
+
+    def get_resource_availability(self, service_name, limit_name, compartment_id, **kwargs):
+        self.service.call("get_resource_availability")
+        limit = self.service.scenario["limits"].get(limit_name)
+        if limit is None:
+            raise self.service._error(404, "NotAuthorizedOrNotFound", "Limit not found")
+        used = self.service.limit_usage(limit_name)
+        return self.service.response(oci.limits.models.ResourceAvailability(
+            used=int(used), available=int(limit - used), fractional_usage=float(used),
+            fractional_availability=float(limit - used), effective_quota_value=float(limit)))
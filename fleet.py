@@ -0,0 +1,295 @@
+"""
+Fleet and Batch Hunts
+Concurrent hunts across OCI profiles/regions (FLEET_TARGETS) or of several instances
+(BATCH_INSTANCES), and run_hunt() picking the mode of a run.
+"""
+
+import json
+import logging
+import os
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime, timezone
+
+import settings
+from deadline import bind_run_deadline, hunt_stop, max_runtime_scope
+from hunt import (InstanceSpec, OciClients, get_default_clients, iter_instances, launch_instance,
+                  resize_threads)
+from notifications import send_discord_message
+from scheduler import launch_pacer
+from settings import (ALWAYS_FREE_ARM_MEMORY_GB, ALWAYS_FREE_ARM_OCPUS, ALWAYS_FREE_DEFAULT_BOOT_VOLUME,
+                      ALWAYS_FREE_MAX_MICRO_INSTANCES, ALWAYS_FREE_MAX_STORAGE_GB, ALWAYS_FREE_REGIONS,
+                      ARM_SHAPE, E2_MICRO_SHAPE, get_oci_config_path)
+
+
+def parse_fleet_targets(spec):
+    """Parse a fleet spec such as 'DEFAULT@us-ashburn-1,ACCOUNT2'.
+
+    Args:
+        spec (str): Comma-separated PROFILE[@REGION] entries.
+
+    Returns:
+        list: (profile, region) tuples, region is None when the profile's region is used.
+    """
+    targets = []
+    for entry in spec.split(","):
+        entry = entry.strip()
+        if not entry:
+            continue
+        profile, _, region = entry.partition("@")
+        targets.append((profile.strip(), region.strip() or None))
+    return targets
+
+
+def write_fleet_status(results):
+    """Write the single status report of a fleet run.
+
+    Args:
+        results (dict): Outcome per target name ('created', 'max_runtime' or 'error: ...').
+    """
+    with open(os.path.join(os.getcwd(), settings.FLEET_STATUS_FILE), "w", encoding="utf-8") as status_file:
+        json.dump({"finished_at": datetime.now(timezone.utc).isoformat(), "targets": results},
+                  status_file, indent=2)
+
+
+def hunt_outcome(clients, spec=None):
+    """Run launch_instance() as one of several concurrent hunts and classify how it ended.
+
+    Args:
+        clients (OciClients): The target to launch in.
+        spec (InstanceSpec, optional): The batch instance to launch, see launch_instance().
+
+    Returns:
+        str: 'created', 'max_runtime' or 'error: ...'.
+    """
+    try:
+        return "created" if launch_instance(clients, spec) else "max_runtime"
+    except Exception as err:
+        logging.exception("Hunt of %s failed", spec.display_name if spec else clients.name)
+        return f"error: {err}"
+
+
+def run_fleet(targets):
+    """Hunt every fleet target concurrently from this process.
+
+    Each target gets its own client set and AD scheduler; launch requests of all targets are
+    spaced by the shared launch_pacer, and one status report is written for the whole fleet.
+
+    Args:
+        targets (list): (profile, region) tuples as returned by parse_fleet_targets().
+
+    Returns:
+        dict: Outcome per target name ('created', 'max_runtime' or 'error: ...').
+    """
+    fleet_clients = []
+    for profile, region in targets:
+        clients = OciClients.from_profile(get_oci_config_path(), profile, region)
+        if clients.region not in ALWAYS_FREE_REGIONS:
+            raise ValueError(f"Fleet target {clients.name} is not in an Always-Free region "
+                             f"({', '.join(ALWAYS_FREE_REGIONS)})")
+        fleet_clients.append(clients)
+    launch_pacer.min_interval = settings.FLEET_MIN_LAUNCH_INTERVAL_SECS
+    logging.info("🚢 Fleet mode: hunting %s", [clients.name for clients in fleet_clients])
+
+    with ThreadPoolExecutor(max_workers=len(fleet_clients), thread_name_prefix="fleet") as executor:
+        futures = {clients.name: executor.submit(bind_run_deadline(hunt_outcome), clients)
+                   for clients in fleet_clients}
+    results = {name: future.result() for name, future in futures.items()}
+    for name, outcome in results.items():
+        logging.info("Fleet target %s: %s", name, outcome)
+    write_fleet_status(results)
+    return results
+
+
+def parse_instance_specs(spec):
+    """Parse a batch spec such as 'arm-1=A1:2/12,arm-2=A1:2/12,micro-1=MICRO'.
+
+    Args:
+        spec (str): Comma-separated NAME=SHAPE[:OCPUS/MEMORY_GB] entries; SHAPE is a full shape
+            name or one of the aliases A1 and MICRO.
+
+    Returns:
+        list: The InstanceSpec of every entry.
+
+    Raises:
+        ValueError: If an entry is malformed.
+    """
+    specs = []
+    for entry in spec.split(","):
+        entry = entry.strip()
+        if not entry:
+            continue
+        name, sep, shape = entry.partition("=")
+        shape, _, size = shape.partition(":")
+        if not sep or not name.strip() or not shape.strip():
+            raise ValueError(f"BATCH_INSTANCES entries must look like NAME=SHAPE[:OCPUS/MEMORY_GB], got {entry!r}")
+        shape = InstanceSpec.SHAPE_ALIASES.get(shape.strip().upper(), shape.strip())
+        ocpus = memory_in_gbs = None
+        if size:
+            try:
+                ocpus, memory_in_gbs = (float(value) for value in size.split("/"))
+            except ValueError:
+                raise ValueError(f"Size of {name.strip()!r} must be OCPUS/MEMORY_GB, got {size!r}") from None
+        specs.append(InstanceSpec(name.strip(), shape, ocpus, memory_in_gbs))
+    return specs
+
+
+def validate_batch_compliance(specs):
+    """Validate that a batch stays within the Always-Free compute and storage allowance.
+
+    The A1 instances may share 4 OCPUs and 24 GB of memory, at most two E2.1.Micro instances
+    are free (and only accepted with ALLOW_MICRO_INSTANCES), and the boot volumes of all of
+    them share the 200 GB of storage.
+
+    Args:
+        specs (list): The InstanceSpec of every instance of the batch.
+
+    Raises:
+        ValueError: If the batch is empty, names an instance twice or exceeds the allowance.
+    """
+    errors = []
+    names = [spec.display_name for spec in specs]
+    if not specs:
+        errors.append("BATCH_INSTANCES doesn't describe any instance")
+    duplicates = sorted({name for name in names if names.count(name) > 1})
+    if duplicates:
+        errors.append(f"Display names must be unique, got {duplicates} more than once")
+    for spec in specs:
+        if spec.shape == ARM_SHAPE:
+            if spec.ocpus is None or spec.ocpus < 1 or spec.ocpus != int(spec.ocpus):
+                errors.append(f"{spec.display_name}: A1 instances need a whole number of OCPUs (e.g. A1:2/12)")
+            elif not spec.ocpus <= spec.memory_in_gbs <= spec.ocpus * 64:
+                errors.append(f"{spec.display_name}: A1 memory must be 1 to 64 GB per OCPU")
+        elif spec.shape == E2_MICRO_SHAPE:
+            if not settings.ALLOW_MICRO_INSTANCES:
+                errors.append(f"{spec.display_name}: {E2_MICRO_SHAPE} instances need ALLOW_MICRO_INSTANCES=true")
+            if spec.ocpus is not None:
+                errors.append(f"{spec.display_name}: {E2_MICRO_SHAPE} is a fixed shape, drop the size")
+        else:
+            errors.append(f"{spec.display_name}: shape '{spec.shape}' is NOT Always-Free eligible")
+    arm_specs = [spec for spec in specs if spec.shape == ARM_SHAPE and spec.ocpus is not None]
+    ocpus = sum(spec.ocpus for spec in arm_specs)
+    memory = sum(spec.memory_in_gbs or 0 for spec in arm_specs)
+    if ocpus > ALWAYS_FREE_ARM_OCPUS or memory > ALWAYS_FREE_ARM_MEMORY_GB:
+        errors.append(f"A1 instances add up to {ocpus:g} OCPUs / {memory:g} GB, the Always-Free allowance "
+                      f"is {ALWAYS_FREE_ARM_OCPUS} OCPUs / {ALWAYS_FREE_ARM_MEMORY_GB} GB")
+    micros = sum(spec.shape == E2_MICRO_SHAPE for spec in specs)
+    if micros > ALWAYS_FREE_MAX_MICRO_INSTANCES:
+        errors.append(f"{micros} {E2_MICRO_SHAPE} instances, at most {ALWAYS_FREE_MAX_MICRO_INSTANCES} are free")
+    storage = len(specs) * max(ALWAYS_FREE_DEFAULT_BOOT_VOLUME, int(settings.BOOT_VOLUME_SIZE))
+    if storage > ALWAYS_FREE_MAX_STORAGE_GB:
+        errors.append(f"{len(specs)} boot volumes of {settings.BOOT_VOLUME_SIZE}GB need {storage}GB, the Always-Free "
+                      f"storage is {ALWAYS_FREE_MAX_STORAGE_GB}GB")
+    if errors:
+        error_msg = "\n".join(f"   {error}" for error in errors)
+        logging.critical("❌ Batch compliance check FAILED!\n%s", error_msg)
+        raise ValueError(f"❌ Batch compliance check FAILED!\n{error_msg}\n\n"
+                         "Fix BATCH_INSTANCES before proceeding to avoid PAYG charges.")
+    logging.info("✅ Batch validated as Always-Free compliant: %s", specs)
+
+
+def write_batch_status(specs, results):
+    """Write the status report of a batch run.
+
+    Args:
+        specs (list): The InstanceSpec of every instance of the batch.
+        results (dict): Outcome per display name.
+    """
+    with open(os.path.join(os.getcwd(), settings.BATCH_STATUS_FILE), "w", encoding="utf-8") as status_file:
+        json.dump({"finished_at": datetime.now(timezone.utc).isoformat(),
+                   "instances": {spec.display_name: dict(spec.as_dict(), outcome=results[spec.display_name])
+                                 for spec in specs}},
+                  status_file, indent=2)
+
+
+def reconcile_instances(specs, clients=None):
+    """Bring the tenancy to the desired state of a batch: launch every missing instance concurrently.
+
+    Instances are matched by display name. Each missing one is hunted by its own launch_instance()
+    with its own AD scheduler and checkpoint, sharing the launch_pacer; the run ends once all of
+    them exist or their hunts end.
+
+    Args:
+        specs (list): The InstanceSpec of every instance, see parse_instance_specs().
+        clients (OciClients, optional): The target to launch in. Defaults to the default target.
+
+    Returns:
+        dict: Outcome per display name ('exists', 'created', 'max_runtime', 'conflict: ...' or 'error: ...').
+    """
+    clients = clients or get_default_clients()
+    validate_batch_compliance(specs)
+    active = [instance for instance in iter_instances(clients.tenancy, clients=clients)
+              if instance.lifecycle_state in ('RUNNING', 'PROVISIONING')]
+    existing = {instance.display_name: instance for instance in active}
+
+    results, missing = {}, []
+    for spec in specs:
+        instance = existing.get(spec.display_name)
+        if instance is None:
+            missing.append(spec)
+        elif instance.shape == spec.shape:
+            results[spec.display_name] = "exists"
+        else:
+            logging.warning("⚠️ %s already exists with shape %s, not launching it as %s",
+                            spec.display_name, instance.shape, spec.shape)
+            results[spec.display_name] = f"conflict: {instance.shape}"
+
+    # Instances outside the batch use up the same allowance, their launches would only hit LimitExceeded
+    wanted = {spec.display_name for spec in specs}
+    others = [instance for instance in active if instance.display_name not in wanted]
+    used_ocpus = sum(instance.shape_config.ocpus or 0 for instance in others
+                     if instance.shape == ARM_SHAPE and instance.shape_config)
+    used_micros = sum(instance.shape == E2_MICRO_SHAPE for instance in others)
+    if (used_ocpus + sum(spec.ocpus or 0 for spec in missing if spec.shape == ARM_SHAPE) > ALWAYS_FREE_ARM_OCPUS
+            or used_micros + sum(spec.shape == E2_MICRO_SHAPE for spec in missing)
+            > ALWAYS_FREE_MAX_MICRO_INSTANCES):
+        logging.warning("⚠️ Instances outside BATCH_INSTANCES (%s) already use part of the Always-Free allowance, "
+                        "some launches will fail with LimitExceeded", [instance.display_name for instance in others])
+
+    if missing:
+        logging.info("🧩 Batch mode: launching %s, %d of %d instances already exist",
+                     missing, len(specs) - len(missing), len(specs))
+        with ThreadPoolExecutor(max_workers=len(missing), thread_name_prefix="batch") as executor:
+            futures = {spec.display_name: executor.submit(bind_run_deadline(hunt_outcome), clients, spec)
+                       for spec in missing}
+        results.update((name, future.result()) for name, future in futures.items())
+    results = {spec.display_name: results[spec.display_name] for spec in specs}
+    for name, outcome in results.items():
+        logging.info("Batch instance %s: %s", name, outcome)
+    write_batch_status(specs, results)
+    return results
+
+
+def run_hunt(fleet_spec="", batch_spec=""):
+    """Run one hunt, for the fleet, a batch or the default target, and notify its outcome.
+
+    Args:
+        fleet_spec (str, optional): Fleet targets (see parse_fleet_targets); empty for the default target.
+        batch_spec (str, optional): Instances to reconcile (see parse_instance_specs); empty for the
+            single instance of DISPLAY_NAME.
+
+    Returns:
+        bool: True if an instance was created (or already exists), for a batch once all of them do.
+    """
+    if fleet_spec and batch_spec:
+        raise ValueError("Fleet mode and batch mode can't be combined, unset FLEET_TARGETS or BATCH_INSTANCES")
+    # The hunts and background resizes of the run share one deadline
+    with max_runtime_scope():
+        if fleet_spec:
+            fleet_results = run_fleet(parse_fleet_targets(fleet_spec))
+            send_discord_message("🚢 Fleet report:\n" + "\n".join(f"{name}: {outcome}"
+                                                                     for name, outcome in fleet_results.items()))
+            created = any(outcome == "created" for outcome in fleet_results.values())
+        elif batch_spec:
+            batch_results = reconcile_instances(parse_instance_specs(batch_spec))
+            send_discord_message("🧩 Batch report:\n" + "\n".join(f"{name}: {outcome}"
+                                                                     for name, outcome in batch_results.items()))
+            created = all(outcome in ("created", "exists") for outcome in batch_results.values())
+        else:
+            created = launch_instance()
+        while resize_threads:
+            resize_threads.pop().join()
+    if created:
+        send_discord_message("🎉 Success! OCI Instance has been created. Time to celebrate!")
+    elif not hunt_stop.is_set():
+        send_discord_message("⏱️ No capacity yet. Max runtime reached; will try again later.")
+    return created
@@ -0,0 +1,56 @@
+"""
+Lazy Imports
+The OCI SDK and requests are only loaded when the first client or session is built, so
+`python main.py --help`, the daemon control commands and tools importing the script modules
+start without them. paramiko is imported by generate_ssh_key_pair() when a key actually has
+to be generated.
+"""
+
+import importlib
+import importlib.util
+import sys
+
+
+class LazyPackage:
+    """Stands in for a package, importing each of its submodules on first attribute access.
+
+    Only the listed submodules are ever imported, never the whole package namespace.
+    """
+
+    def __init__(self, name, submodules):
+        self._name = name
+        self._submodules = frozenset(submodules)
+
+    def __getattr__(self, attr):
+        if attr not in self._submodules:
+            raise AttributeError(f"{self._name}.{attr} is not one of the lazily imported submodules")
+        module = importlib.import_module(f"{self._name}.{attr}")
+        # Cached on the instance, later lookups no longer reach __getattr__
+        setattr(self, attr, module)
+        return module
+
+
+def lazy_import(name):
+    """Import a module on first attribute access instead of at import time.
+
+    Args:
+        name (str): The module name.
+
+    Returns:
+        module: The (lazily loaded) module.
+    """
+    if name in sys.modules:
+        return sys.modules[name]
+    spec = importlib.util.find_spec(name)
+    loader = importlib.util.LazyLoader(spec.loader)
+    spec.loader = loader
+    module = importlib.util.module_from_spec(spec)
+    sys.modules[name] = module
+    loader.exec_module(module)
+    return module
+
+
+# The OCI submodules the script uses, each imported the first time it is accessed
+oci = LazyPackage("oci", ["base_client", "config", "core", "exceptions", "identity", "limits", "pagination",
+                          "response", "retry", "work_requests"])
+requests = lazy_import("requests")
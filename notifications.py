@@ -0,0 +1,316 @@
+"""
+Notifications
+Discord, Telegram and e-mail notifications, delivered in the background by the
+NotificationDispatcher so that a slow channel never holds up a launch.
+"""
+
+import abc
+import atexit
+import logging
+import queue
+import smtplib
+import threading
+import time
+from email.mime.multipart import MIMEMultipart
+from email.mime.text import MIMEText
+
+import settings
+from lazy_imports import requests
+
+
+def build_email_message(subject, body, email):
+    """Build an HTML email sent from and to the same address.
+
+    Args:
+        subject (str): The subject of the email.
+        body (str): The HTML body/content of the email.
+        email (str): The sender's (and recipient's) email address.
+
+    Returns:
+        MIMEMultipart: The email message.
+    """
+    # Set up the MIME
+    message = MIMEMultipart()
+    message["Subject"] = subject
+    message["From"] = email
+    message["To"] = email
+
+    # Attach HTML content to the email
+    html_body = MIMEText(body, "html")
+    message.attach(html_body)
+    return message
+
+
+def send_email(subject, body, email, password):
+    """Send an HTML email using the SMTP protocol.
+
+    Args:
+        subject (str): The subject of the email.
+        body (str): The HTML body/content of the email.
+        email (str): The sender's email address.
+        password (str): The sender's email password or app-specific password.
+
+    Raises:
+        smtplib.SMTPException: If an error occurs during the SMTP communication.
+    """
+    SmtpBackend(email, password).send_batch([Notification(subject=subject, html_body=body)])
+
+
+class Notification:
+    """A message queued on the NotificationDispatcher.
+
+    Chat backends (Discord, Telegram) deliver `message`; the email backend delivers
+    notifications that carry a `subject` and `html_body`.
+    """
+
+    def __init__(self, message=None, subject=None, html_body=None):
+        self.message = message
+        self.subject = subject
+        self.html_body = html_body
+        self.count = 1
+
+    def key(self):
+        return self.message, self.subject, self.html_body
+
+    def text(self):
+        return self.message if self.count == 1 else f"{self.message} (x{self.count})"
+
+
+class NotificationBackend(abc.ABC):
+    """Interface of a notification channel used by NotificationDispatcher."""
+
+    name = "backend"
+
+    def accepts(self, notification):
+        """Return True if this backend delivers the given notification."""
+        return bool(notification.message)
+
+    @abc.abstractmethod
+    def send_batch(self, notifications):
+        """Deliver a batch of coalesced notifications."""
+
+
+class ChatBackend(NotificationBackend):
+    """Base class for chat backends that post the batch as one or more text messages."""
+
+    max_length = 2000
+
+    def __init__(self, session=None, timeout=None):
+        self.session = session or requests.Session()
+        self.timeout = settings.NOTIFY_TIMEOUT_SECS if timeout is None else timeout
+
+    def chunks(self, notifications):
+        """Join the batch into as few messages as the channel's length limit allows."""
+        chunk = ""
+        for notification in notifications:
+            text = notification.text()[:self.max_length]
+            if chunk and len(chunk) + len(text) + 1 > self.max_length:
+                yield chunk
+                chunk = ""
+            chunk = f"{chunk}\n{text}" if chunk else text
+        if chunk:
+            yield chunk
+
+    @abc.abstractmethod
+    def post(self, text):
+        """Post one message to the channel.
+
+        Returns:
+            requests.Response: The response of the channel.
+        """
+
+    def send_batch(self, notifications):
+        for text in self.chunks(notifications):
+            response = self.post(text)
+            response.raise_for_status()
+
+
+class DiscordBackend(ChatBackend):
+    """Posts notifications to a Discord webhook."""
+
+    name = "discord"
+
+    def __init__(self, webhook_url, session=None, timeout=None):
+        super().__init__(session, timeout)
+        self.webhook_url = webhook_url
+
+    def post(self, text):
+        return self.session.post(self.webhook_url, json={"content": text}, timeout=self.timeout)
+
+
+class TelegramBackend(ChatBackend):
+    """Sends notifications through a Telegram bot."""
+
+    name = "telegram"
+    max_length = 4096
+
+    def __init__(self, token, chat_id, api_url=None, session=None, timeout=None):
+        super().__init__(session, timeout)
+        self.url = f"{(api_url or settings.TELEGRAM_API_URL).rstrip('/')}/bot{token}/sendMessage"
+        self.chat_id = chat_id
+
+    def post(self, text):
+        return self.session.post(self.url, data={"chat_id": self.chat_id, "text": text}, timeout=self.timeout)
+
+
+class SmtpBackend(NotificationBackend):
+    """Sends HTML emails over a single SMTP+STARTTLS connection per batch."""
+
+    name = "email"
+
+    def __init__(self, email, password, host=None, port=None, timeout=None):
+        self.email = email
+        self.password = password
+        self.host = host or settings.SMTP_HOST
+        self.port = port or settings.SMTP_PORT
+        self.timeout = settings.NOTIFY_TIMEOUT_SECS if timeout is None else timeout
+
+    def accepts(self, notification):
+        return bool(notification.subject and notification.html_body)
+
+    def send_batch(self, notifications):
+        # Connect to the SMTP server
+        with smtplib.SMTP(self.host, self.port, timeout=self.timeout) as server:
+            try:
+                # Start TLS for security
+                if settings.SMTP_STARTTLS:
+                    server.starttls()
+                # Login to the server
+                server.login(self.email, self.password)
+                # Send the emails
+                for notification in notifications:
+                    message = build_email_message(notification.subject, notification.html_body, self.email)
+                    server.sendmail(self.email, self.email, message.as_string())
+            except smtplib.SMTPException as mail_err:
+                # Handle SMTP exceptions (e.g., authentication failure, connection issues)
+                logging.error("Error while sending email: %s", mail_err)
+                raise
+
+
+class NotificationDispatcher:
+    """Delivers notifications from a background worker so they never block the launch loop.
+
+    Notifications queued within `coalesce_secs` of each other are sent as one batch per backend,
+    and identical messages in a batch are collapsed into one line with a repeat count.
+    """
+
+    _STOP = object()
+
+    def __init__(self, backends, coalesce_secs=None):
+        self.backends = backends
+        self.coalesce_secs = settings.NOTIFY_COALESCE_SECS if coalesce_secs is None else coalesce_secs
+        self._queue = queue.Queue()
+        self._worker = None
+        self._lock = threading.Lock()
+
+    def notify(self, message=None, subject=None, html_body=None):
+        """Queue a notification and return immediately."""
+        if not self.backends:
+            return
+        self._start()
+        self._queue.put(Notification(message, subject, html_body))
+
+    def _start(self):
+        with self._lock:
+            if self._worker is None:
+                self._worker = threading.Thread(target=self._run, name="notifications", daemon=True)
+                self._worker.start()
+                atexit.register(self.shutdown)
+
+    def _collect_batch(self, first):
+        batch = {first.key(): first}
+        deadline = time.monotonic() + self.coalesce_secs
+        stop = False
+        while not stop:
+            remaining = deadline - time.monotonic()
+            if remaining <= 0:
+                break
+            try:
+                item = self._queue.get(timeout=remaining)
+            except queue.Empty:
+                break
+            if item is self._STOP:
+                stop = True
+            elif item.key() in batch:
+                batch[item.key()].count += 1
+            else:
+                batch[item.key()] = item
+            self._queue.task_done()
+        return list(batch.values()), stop
+
+    def _run(self):
+        stop = False
+        while not stop:
+            first = self._queue.get()
+            if first is self._STOP:
+                self._queue.task_done()
+                break
+            notifications, stop = self._collect_batch(first)
+            for backend in self.backends:
+                accepted = [notification for notification in notifications if backend.accepts(notification)]
+                if not accepted:
+                    continue
+                try:
+                    backend.send_batch(accepted)
+                except Exception as err:  # a failing channel must never stop the hunt
+                    logging.error("Failed to send %s notification: %s", backend.name, err)
+            self._queue.task_done()
+
+    def flush(self, timeout=None):
+        """Wait until every queued notification was handled.
+
+        Args:
+            timeout (float, optional): Maximum seconds to wait. Defaults to NOTIFY_TIMEOUT_SECS
+                plus the coalescing window.
+
+        Returns:
+            bool: True if the queue was drained, False on timeout.
+        """
+        timeout = settings.NOTIFY_TIMEOUT_SECS + self.coalesce_secs if timeout is None else timeout
+        end = time.monotonic() + timeout
+        with self._queue.all_tasks_done:
+            while self._queue.unfinished_tasks:
+                remaining = end - time.monotonic()
+                if remaining <= 0:
+                    return False
+                self._queue.all_tasks_done.wait(remaining)
+        return True
+
+    def shutdown(self, timeout=None):
+        """Deliver what is queued and stop the worker."""
+        if self._worker is None or not self._worker.is_alive():
+            return
+        self._queue.put(self._STOP)
+        self.flush(timeout)
+
+
+notification_dispatcher = None
+
+
+def get_notification_dispatcher():
+    """Return the process-wide NotificationDispatcher, building its backends from the environment."""
+    global notification_dispatcher
+    if notification_dispatcher is None:
+        session = requests.Session()
+        backends = []
+        if settings.DISCORD_WEBHOOK:
+            backends.append(DiscordBackend(settings.DISCORD_WEBHOOK, session))
+        if settings.TELEGRAM_TOKEN and settings.TELEGRAM_USER_ID:
+            backends.append(TelegramBackend(settings.TELEGRAM_TOKEN, settings.TELEGRAM_USER_ID, session=session))
+        if settings.NOTIFY_EMAIL:
+            backends.append(SmtpBackend(settings.EMAIL, settings.EMAIL_PASSWORD))
+        notification_dispatcher = NotificationDispatcher(backends)
+    return notification_dispatcher
+
+
+def reset_notification_dispatcher():
+    """Shut down the NotificationDispatcher, a new one is built from the environment on its next use."""
+    global notification_dispatcher
+    dispatcher, notification_dispatcher = notification_dispatcher, None
+    if dispatcher is not None:
+        dispatcher.shutdown()
+
+
+def send_discord_message(message):
+    """Queue a status message for the chat channels (Discord, Telegram) if any is configured."""
+    get_notification_dispatcher().notify(message)
@@ -0,0 +1,212 @@
+"""
+Rate Limiter
+Client-side token buckets per OCI endpoint family (OCI_RATE_LIMITS), shared by every client
+of the process, and the Retry-After parsing of throttled responses.
+"""
+
+import threading
+import time
+from datetime import datetime, timezone
+from email.utils import parsedate_to_datetime
+
+import settings
+from deadline import check_run_deadline
+from lazy_imports import oci
+from telemetry import telemetry
+
+
+def parse_retry_after(headers):
+    """Read the Retry-After header of an OCI response or error.
+
+    Args:
+        headers (dict): The response headers (case-insensitive lookup).
+
+    Returns:
+        float: Seconds to wait, None if the header is absent or malformed.
+    """
+    value = next((value for key, value in (headers or {}).items() if key.lower() == "retry-after"), None)
+    if value is None:
+        return None
+    try:
+        return max(0.0, float(value))
+    except (TypeError, ValueError):
+        pass
+    try:
+        retry_at = parsedate_to_datetime(value)
+    except (TypeError, ValueError):
+        return None
+    if retry_at.tzinfo is None:
+        retry_at = retry_at.replace(tzinfo=timezone.utc)
+    return max(0.0, (retry_at - datetime.now(timezone.utc)).total_seconds())
+
+
+def parse_rate_limits(spec):
+    """Parse OCI_RATE_LIMITS, e.g. 'launch=0.5/3,compute=5/5'.
+
+    Args:
+        spec (str): Comma-separated FAMILY=RATE[/BURST] entries.
+
+    Returns:
+        dict: (rate per second, burst) per endpoint family.
+    """
+    limits = {}
+    for entry in spec.split(","):
+        family, sep, value = entry.strip().partition("=")
+        if not sep:
+            continue
+        rate, _, burst = value.partition("/")
+        limits[family.strip()] = (float(rate), float(burst or 1))
+    return limits
+
+
+class TokenBucket:
+    """Token bucket for one endpoint family of one tenancy/region.
+
+    The rate adapts AIMD style: it is halved on every 429 (down to a tenth of the configured
+    rate) and grows back by a twentieth of it on every accepted call, so the process settles just
+    below OCI's throttle ceiling. A Retry-After header pauses the bucket until it has passed.
+    """
+
+    MIN_RATE_FRACTION = 0.1
+    RECOVERY_FRACTION = 0.05
+
+    def __init__(self, rate, burst=1.0, clock=time):
+        self.clock = clock
+        self.max_rate = rate
+        self.rate = rate
+        self.burst = max(1.0, burst)
+        self.tokens = self.burst
+        self.updated = None
+        self.paused_until = 0.0
+        self._lock = threading.Lock()
+
+    def _refill(self, now):
+        if self.updated is not None:
+            self.tokens = min(self.burst, self.tokens + (now - self.updated) * self.rate)
+        self.updated = now
+
+    def try_acquire(self):
+        """Take a token if one is available, without blocking.
+
+        Returns:
+            float: 0.0 if a token was taken, else the seconds until the next one.
+        """
+        if self.max_rate <= 0:
+            return 0.0
+        with self._lock:
+            now = self.clock.monotonic()
+            self._refill(now)
+            # The tolerance keeps float rounding from spinning on 0.999... tokens
+            if now >= self.paused_until and self.tokens >= 1 - 1e-9:
+                self.tokens = max(0.0, self.tokens - 1)
+                return 0.0
+            return max(self.paused_until - now, (1 - self.tokens) / self.rate)
+
+    def acquire(self):
+        """Block until a request may be sent.
+
+        Returns:
+            float: Seconds spent waiting.
+        """
+        waited = 0.0
+        while True:
+            delay = self.try_acquire()
+            if not delay:
+                return waited
+            check_run_deadline(delay)
+            self.clock.sleep(delay)
+            waited += delay
+
+    def throttled(self, retry_after=None):
+        """Slow down after a 429, pausing for Retry-After seconds when given."""
+        with self._lock:
+            now = self.clock.monotonic()
+            self._refill(now)
+            self.rate = max(self.max_rate * self.MIN_RATE_FRACTION, self.rate / 2)
+            self.tokens = 0.0
+            if retry_after:
+                self.paused_until = max(self.paused_until, now + retry_after)
+
+    def succeeded(self):
+        """Speed back up towards the configured rate."""
+        with self._lock:
+            self.rate = min(self.max_rate, self.rate + self.max_rate * self.RECOVERY_FRACTION)
+
+
+class RateLimiter:
+    """Process-wide token buckets keyed by (tenancy, region, endpoint family).
+
+    Shared by every target and thread, so racing ADs or fleet targets of the same tenancy
+    draw from the same budget. The buckets refill on clock (see OciClients.clock).
+    """
+
+    def __init__(self, clock=time):
+        self.clock = clock
+        self._buckets = {}
+        self._lock = threading.Lock()
+
+    def reset(self):
+        """Forget all buckets, e.g. after OCI_RATE_LIMITS changed."""
+        with self._lock:
+            self._buckets.clear()
+
+    def bucket(self, scope, family):
+        with self._lock:
+            key = (scope, family)
+            if key not in self._buckets:
+                rate, burst = parse_rate_limits(settings.OCI_RATE_LIMITS).get(family, (0.0, 1.0))
+                self._buckets[key] = TokenBucket(rate, burst, self.clock)
+            return self._buckets[key]
+
+    def call(self, scope, family, func, *args, **kwargs):
+        """Call an SDK method once a token is available, adapting the rate to 429s.
+
+        Raises:
+            oci.exceptions.ServiceError: Errors of the call are re-raised unchanged.
+            RunDeadlineExceeded: If the run deadline has passed, or would while waiting for a token.
+        """
+        check_run_deadline()
+        bucket = self.bucket(scope, family)
+        waited = bucket.acquire()
+        if waited:
+            telemetry.observe_rate_limit_wait(family, waited)
+        try:
+            response = func(*args, **kwargs)
+        except oci.exceptions.ServiceError as srv_err:
+            self._settle(bucket, srv_err)
+            raise
+        bucket.succeeded()
+        return response
+
+    @staticmethod
+    def _settle(bucket, srv_err):
+        # Any answer but a 429 (e.g. out of capacity) means the rate was accepted
+        if srv_err.status == 429:
+            bucket.throttled(parse_retry_after(srv_err.headers))
+        else:
+            bucket.succeeded()
+
+
+rate_limiter = RateLimiter()
+
+
+class RateLimitedClient:
+    """Proxy of an OCI SDK client whose method calls go through the rate limiter."""
+
+    def __init__(self, client, family, scope, limiter=None):
+        self._client = client
+        self._family = family
+        self._scope = scope
+        self._limiter = limiter or rate_limiter
+
+    def __getattr__(self, name):
+        attr = getattr(self._client, name)
+        if name.startswith("_") or not callable(attr):
+            return attr
+        # LaunchInstance has a much lower throttle ceiling than the other compute calls
+        family = "launch" if name == "launch_instance" else self._family
+
+        def limited(*args, **kwargs):
+            return self._limiter.call(self._scope, family, attr, *args, **kwargs)
+
+        return limited
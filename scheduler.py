@@ -0,0 +1,333 @@
+"""
+AD Scheduler
+Adaptive per-AD retry scheduling: quick retries on capacity errors, jittered backoff on
+throttling, AD history across runs and the process-wide launch pacing.
+"""
+
+import json
+import logging
+import os
+import random
+import sqlite3
+import threading
+import time
+from datetime import datetime, timezone
+
+import settings
+
+# Serializes read-modify-write of AD_HISTORY_FILE when several targets run concurrently
+ad_history_lock = threading.Lock()
+
+
+def is_capacity_error(srv_err):
+    """Check whether an OCI service error means the AD is out of capacity.
+
+    Args:
+        srv_err (oci.exceptions.ServiceError): The error raised by the OCI SDK.
+
+    Returns:
+        bool: True if the error is a capacity error, False otherwise.
+    """
+    return (srv_err.code in ("OutOfCapacity", "Out of host capacity")
+            or "capacity" in str(srv_err.message).lower())
+
+
+def jittered_backoff(attempt, base, cap):
+    """Exponential backoff with full jitter.
+
+    Args:
+        attempt (int): Number of consecutive failures so far (1 for the first one).
+        base (float): Backoff for the first failure in seconds.
+        cap (float): Upper bound of the backoff in seconds.
+
+    Returns:
+        float: Seconds to wait before the next attempt.
+    """
+    return random.uniform(0, min(cap, base * (2 ** max(0, attempt - 1))))
+
+
+def ad_key(ad_name):
+    """Strip the tenancy-specific prefix from an AD name (e.g. 'Uocm:US-ASHBURN-AD-1')."""
+    return ad_name.split(":")[-1]
+
+
+class AdState:
+    """Retry state the scheduler keeps for a single availability domain."""
+
+    def __init__(self, ad_name):
+        self.ad_name = ad_name
+        self.attempts = 0
+        self.consecutive_failures = 0
+        self.last_error_code = None
+        self.ready_at = 0.0
+        self.success_times = []
+        # Successes read from the CAPACITY_DB_FILE attempt history, never written back to AD_HISTORY_FILE
+        self.recorded_success_times = []
+
+
+class AdScheduler:
+    """Adaptive per-AD retry scheduler for the launch loop.
+
+    Capacity errors only push back the AD that reported them (by CAPACITY_RETRY_SECS with a
+    small jitter), so the other ADs are probed in the meantime. TooManyRequests is tenancy wide
+    and backs off every AD exponentially with full jitter. Ready ADs are ordered by how often they
+    freed capacity at the current hour of day in previous runs, read from AD_HISTORY_FILE and
+    the CAPACITY_DB_FILE attempt history (see load_capacity_history).
+    """
+
+    def __init__(self, ad_names, capacity_wait, throttle_base, throttle_cap, min_interval=0.0,
+                 history_file=None, clock=time):
+        self.clock = clock
+        self.states = {ad_name: AdState(ad_name) for ad_name in ad_names}
+        self.capacity_wait = capacity_wait
+        self.throttle_base = throttle_base
+        self.throttle_cap = throttle_cap
+        self.min_interval = min_interval
+        self.history_file = history_file
+        self.throttle_failures = 0
+        self.global_ready_at = 0.0
+        self._lock = threading.Lock()
+        if history_file:
+            self.load_history(history_file)
+
+    def load_history(self, history_file):
+        """Load historical success timestamps (epoch seconds) keyed by AD suffix."""
+        try:
+            with open(history_file, "r", encoding="utf-8") as history:
+                success_times = json.load(history)
+        except (OSError, ValueError):
+            return
+        for state in self.states.values():
+            state.success_times = list(success_times.get(ad_key(state.ad_name), []))
+
+    def load_capacity_history(self, db_path, region, shape):
+        """Add the successful launches of the attempt history to the hour-of-day statistics.
+
+        The history keeps the attempts of every run, target and batch instance of the region,
+        while AD_HISTORY_FILE only sees the successes of this working directory.
+
+        Args:
+            db_path (str): Path of the CAPACITY_DB_FILE SQLite history.
+            region (str): Only successes in this region count.
+            shape (str): Only successes of this shape count.
+        """
+        if not os.path.exists(db_path):
+            return
+        try:
+            db = sqlite3.connect(db_path)
+            try:
+                rows = db.execute("SELECT ad, ts FROM attempts WHERE outcome = 'success' AND region = ? "
+                                  "AND shape = ? ORDER BY ts", (region, shape)).fetchall()
+            finally:
+                db.close()
+        except sqlite3.Error as db_err:
+            logging.warning("Could not read the attempt history in %s: %s", db_path, db_err)
+            return
+        by_ad = {}
+        for ad_name, ts in rows:
+            by_ad.setdefault(ad_key(ad_name), []).append(ts)
+        for state in self.states.values():
+            # Successes already in AD_HISTORY_FILE are also in the history, count them once
+            known = {int(success_time) for success_time in state.success_times}
+            state.recorded_success_times = [ts for ts in by_ad.get(ad_key(state.ad_name), [])
+                                            if ts not in known][-settings.AD_HISTORY_MAX_ENTRIES:]
+
+    def save_history(self):
+        """Persist the success timestamps so later runs can learn from them."""
+        if not self.history_file:
+            return
+        with ad_history_lock:
+            try:
+                with open(self.history_file, "r", encoding="utf-8") as history:
+                    success_times = json.load(history)
+            except (OSError, ValueError):
+                success_times = {}
+            for state in self.states.values():
+                success_times[ad_key(state.ad_name)] = state.success_times[-settings.AD_HISTORY_MAX_ENTRIES:]
+            with open(self.history_file, "w", encoding="utf-8") as history:
+                json.dump(success_times, history, indent=2)
+
+    def checkpoint(self):
+        """Serialize the retry state so that a later run can resume it.
+
+        Monotonic deadlines are stored as remaining seconds next to a wall-clock timestamp.
+
+        Returns:
+            dict: The checkpoint, with per-AD state keyed by AD suffix.
+        """
+        now = self.clock.monotonic()
+        with self._lock:
+            return {
+                "saved_at": self.clock.time(),
+                "throttle_failures": self.throttle_failures,
+                "global_ready_in": max(0.0, self.global_ready_at - now),
+                "ads": {ad_key(state.ad_name): {"attempts": state.attempts,
+                                                "consecutive_failures": state.consecutive_failures,
+                                                "last_error_code": state.last_error_code,
+                                                "ready_in": max(0.0, state.ready_at - now)}
+                        for state in self.states.values()},
+            }
+
+    def restore(self, checkpoint):
+        """Resume the retry state of a checkpoint, minus the time elapsed since it was saved.
+
+        Args:
+            checkpoint (dict): A checkpoint built by checkpoint().
+
+        Returns:
+            int: The number of attempts resumed.
+        """
+        now = self.clock.monotonic()
+        elapsed = max(0.0, self.clock.time() - checkpoint.get("saved_at", self.clock.time()))
+        resumed = 0
+        with self._lock:
+            self.throttle_failures = checkpoint.get("throttle_failures", 0)
+            self.global_ready_at = now + max(0.0, checkpoint.get("global_ready_in", 0.0) - elapsed)
+            for state in self.states.values():
+                saved = checkpoint.get("ads", {}).get(ad_key(state.ad_name))
+                if not saved:
+                    continue
+                state.attempts = saved.get("attempts", 0)
+                state.consecutive_failures = saved.get("consecutive_failures", 0)
+                state.last_error_code = saved.get("last_error_code")
+                state.ready_at = now + max(0.0, saved.get("ready_in", 0.0) - elapsed)
+                resumed += state.attempts
+        return resumed
+
+    def hour_score(self, state, hour=None):
+        """Number of past successes of an AD within the given UTC hour of day."""
+        hour = datetime.fromtimestamp(self.clock.time(), timezone.utc).hour if hour is None else hour
+        return sum(1 for success_time in state.success_times + state.recorded_success_times
+                   if datetime.fromtimestamp(success_time, timezone.utc).hour == hour)
+
+    def _rank(self, state, now):
+        # Earlier ready time first, then ADs that freed capacity at this hour, then fewer failures
+        return (max(state.ready_at, now), -self.hour_score(state), state.consecutive_failures)
+
+    def ready_ads(self):
+        """Return the ADs that may be probed right now, best candidates first."""
+        now = self.clock.monotonic()
+        with self._lock:
+            if self.global_ready_at > now:
+                return []
+            ready = [state for state in self.states.values() if state.ready_at <= now]
+            ready.sort(key=lambda state: self._rank(state, now))
+            return [state.ad_name for state in ready]
+
+    def wait_time(self):
+        """Seconds until at least one AD may be probed."""
+        now = self.clock.monotonic()
+        with self._lock:
+            earliest = min(state.ready_at for state in self.states.values())
+            return max(0.0, max(earliest, self.global_ready_at) - now)
+
+    def next_ad(self):
+        """Pick the AD to probe next.
+
+        Returns:
+            tuple: (ad_name, wait_secs) where wait_secs is how long to wait before probing it.
+        """
+        now = self.clock.monotonic()
+        with self._lock:
+            state = min(self.states.values(), key=lambda state: self._rank(state, now))
+            return state.ad_name, max(0.0, max(state.ready_at, self.global_ready_at) - now)
+
+    def hold(self, ad_name, secs):
+        """Keep an AD from being probed for secs without counting a failure (see CapacityProber)."""
+        with self._lock:
+            state = self.states[ad_name]
+            state.ready_at = max(state.ready_at, self.clock.monotonic() + secs)
+
+    def record_attempt(self, ad_name):
+        """Count an attempt and enforce the minimum spacing between launch requests."""
+        with self._lock:
+            state = self.states[ad_name]
+            state.attempts += 1
+            self.global_ready_at = max(self.global_ready_at, self.clock.monotonic() + self.min_interval)
+            return state.attempts
+
+    def record_success(self, ad_name):
+        """Reset the AD backoff and remember when it freed capacity."""
+        with self._lock:
+            state = self.states[ad_name]
+            state.consecutive_failures = 0
+            state.last_error_code = None
+            state.ready_at = 0.0
+            state.success_times.append(self.clock.time())
+            self.throttle_failures = 0
+        try:
+            self.save_history()
+        except OSError as err:
+            logging.warning("Could not save AD history to %s: %s", self.history_file, err)
+
+    def record_failure(self, ad_name, code, status=None, capacity_error=False, retry_after=None):
+        """Schedule the next probe after a failed launch attempt.
+
+        Args:
+            ad_name (str): The AD the attempt was made in.
+            code (str): The OCI error code.
+            status (int, optional): The HTTP status of the error.
+            capacity_error (bool, optional): True if the AD reported it is out of capacity.
+            retry_after (float, optional): The Retry-After of a throttling error, a lower bound of the delay.
+
+        Returns:
+            float: The backoff chosen for this failure in seconds.
+        """
+        now = self.clock.monotonic()
+        with self._lock:
+            state = self.states[ad_name]
+            state.consecutive_failures += 1
+            state.last_error_code = code
+            if code == "TooManyRequests" or status == 429:
+                # Throttling applies to the whole tenancy, back off every AD
+                self.throttle_failures += 1
+                delay = max(jittered_backoff(self.throttle_failures, self.throttle_base, self.throttle_cap),
+                            retry_after or 0.0)
+                self.global_ready_at = max(self.global_ready_at, now + delay)
+                return delay
+            self.throttle_failures = 0
+            if capacity_error:
+                delay = self.capacity_wait * random.uniform(0.9, 1.1)
+                if any(self.hour_score(other) for other in self.states.values()):
+                    # Capacity was freed at this hour before, probe twice as often
+                    delay /= 2
+            else:
+                # InternalError / Bad Gateway: back off this AD only, bounded by the throttle cap
+                delay = self.capacity_wait + jittered_backoff(state.consecutive_failures,
+                                                              self.capacity_wait or 1, self.throttle_cap)
+            state.ready_at = now + delay
+            return delay
+
+
+class LaunchPacer:
+    """Spaces the launch requests of every target in the process by a minimum interval."""
+
+    def __init__(self, min_interval=0.0, clock=time):
+        self.min_interval = min_interval
+        self.clock = clock
+        self._lock = threading.Lock()
+        self._next_slot = 0.0
+
+    def reserve(self):
+        """Book the next launch slot.
+
+        Returns:
+            float: Seconds to wait before sending the launch request.
+        """
+        if self.min_interval <= 0:
+            return 0.0
+        with self._lock:
+            now = self.clock.monotonic()
+            slot = max(now, self._next_slot)
+            self._next_slot = slot + self.min_interval
+        return slot - now
+
+    def wait(self):
+        """Block until the next launch request may be sent."""
+        delay = self.reserve()
+        if delay > 0:
+            self.clock.sleep(delay)
+
+
+# Shared by all targets; only spaces requests in fleet mode (see run_fleet)
+launch_pacer = LaunchPacer()
@@ -0,0 +1,251 @@
+"""
+Settings
+The script settings, read from the environment (and oci.env) by load_settings(), and the
+Always-Free constants they are checked against. Read them as settings.NAME, so that a
+reload of the daemon reaches every module.
+"""
+
+import configparser
+import logging
+import os
+import sys
+
+from dotenv import load_dotenv
+
+
+ARM_SHAPE = "VM.Standard.A1.Flex"
+E2_MICRO_SHAPE = "VM.Standard.E2.1.Micro"
+
+# Always-Free Tier Configuration Constants
+ALWAYS_FREE_SHAPES = ["VM.Standard.A1.Flex"]  # Ampere ARM CPU only
+# NOTE: Oracle Always-Free eligibility can vary by tenancy/region over time.
+# This list is intentionally restrictive to reduce the risk of PAYG charges.
+ALWAYS_FREE_REGIONS = ["us-ashburn-1", "us-phoenix-1", "ca-toronto-1"]
+ALWAYS_FREE_OPERATING_SYSTEMS = ["Canonical Ubuntu"]
+ALWAYS_FREE_MAX_STORAGE_GB = 200
+ALWAYS_FREE_DEFAULT_BOOT_VOLUME = 50
+# Always-Free compute allowance that batch mode (BATCH_INSTANCES) may split between instances
+ALWAYS_FREE_ARM_OCPUS = 4
+ALWAYS_FREE_ARM_MEMORY_GB = 24
+ALWAYS_FREE_MAX_MICRO_INSTANCES = 2
+
+
+def load_settings():
+    """(Re)read the script settings from the environment into the module constants.
+
+    Runs at import time against the plain environment, and again from load_env_file() once
+    oci.env has been loaded.
+    """
+    global is_ci_cd, NOTIFY_EMAIL, DISCORD_WEBHOOK, OCI_CONFIG, OCT_FREE_AD, DISPLAY_NAME, WAIT_TIME
+    global MAX_RUNTIME_SECS, SSH_AUTHORIZED_KEYS_FILE, OCI_IMAGE_ID, OCI_COMPUTE_SHAPE
+    global SECOND_MICRO_INSTANCE, OCI_SUBNET_ID, OPERATING_SYSTEM, OS_VERSION, ASSIGN_PUBLIC_IP
+    global BOOT_VOLUME_SIZE, EMAIL, EMAIL_PASSWORD, TELEGRAM_TOKEN, TELEGRAM_USER_ID
+    global TELEGRAM_API_URL, SMTP_HOST, SMTP_PORT, SMTP_STARTTLS, NOTIFY_TIMEOUT_SECS
+    global NOTIFY_COALESCE_SECS, FLEET_TARGETS, FLEET_MIN_LAUNCH_INTERVAL_SECS, FLEET_STATUS_FILE
+    global LAUNCH_RETRY_ATTEMPTS, LAUNCH_HEDGE_PERCENTILE
+    global RACE_ALL_ADS, CAPACITY_RETRY_SECS, THROTTLE_BACKOFF_BASE_SECS, THROTTLE_BACKOFF_MAX_SECS
+    global MIN_LAUNCH_INTERVAL_SECS, AD_HISTORY_FILE, AD_HISTORY_MAX_ENTRIES, DISCOVERY_CACHE_FILE
+    global DISCOVERY_CACHE_TTL_SECS, DISCOVERY_CACHE_REFRESH, INSTANCE_POLL_INITIAL_SECS
+    global HUNT_CHECKPOINT_FILE, HUNT_CHECKPOINT_MAX_AGE_SECS, HUNT_CHECKPOINT_INTERVAL_SECS
+    global DAEMON_WINDOW_SECS, DAEMON_PAUSE_SECS, DAEMON_SCHEDULE_HOURS, DAEMON_CONTROL_SOCKET
+    global DAEMON_WATCH_INTERVAL_SECS
+    global OCI_HTTP_POOL_SIZE, OCI_CONNECT_TIMEOUT_SECS, OCI_READ_TIMEOUT_SECS, OCI_TCP_KEEPALIVE_SECS
+    global IMAGE_INDEX_FILE, BATCH_INSTANCES, BATCH_STATUS_FILE, ALLOW_MICRO_INSTANCES
+    global SHAPE_FALLBACK_LADDER, SHAPE_FALLBACK_AFTER_ERRORS, SHAPE_RESIZE_RETRY_SECS
+    global CAPACITY_PROBE, CAPACITY_PROBE_INTERVAL_SECS, CAPACITY_PROBE_VERIFY_SECS, LIMITS_CHECK, LIMITS_CACHE_SECS
+    global INSTANCE_POLL_MAX_SECS, INSTANCE_CONFIRM_TIMEOUT_SECS, STARTUP_BUDGET_SECS
+    global TELEMETRY_FILE, METRICS_FILE, METRICS_HOST, METRICS_PORT, CAPACITY_DB_FILE, OCI_RATE_LIMITS
+    # Check if we're in CI/CD environment
+    is_ci_cd = os.getenv('CI') or os.getenv('GITHUB_ACTIONS')
+
+    if is_ci_cd:
+        logging.info("Running in CI/CD environment")
+        # Ensure we don't try to send notifications in CI/CD unless explicitly enabled
+        if os.getenv('CI_NOTIFICATIONS', 'false').lower() != 'true':
+            NOTIFY_EMAIL = False
+            DISCORD_WEBHOOK = ""
+
+    # Access loaded environment variables and strip white spaces
+    OCI_CONFIG = os.getenv("OCI_CONFIG", "").strip()
+    OCT_FREE_AD = os.getenv("OCT_FREE_AD", "").strip()
+    DISPLAY_NAME = os.getenv("DISPLAY_NAME", "").strip()
+    WAIT_TIME = int(os.getenv("REQUEST_WAIT_TIME_SECS", "0").strip())
+    try:
+        MAX_RUNTIME_SECS = int(os.getenv("MAX_RUNTIME_SECS", "0").strip() or "0")
+    except ValueError:
+        MAX_RUNTIME_SECS = 0
+    SSH_AUTHORIZED_KEYS_FILE = os.getenv("SSH_AUTHORIZED_KEYS_FILE", "").strip()
+    OCI_IMAGE_ID = os.getenv("OCI_IMAGE_ID", None).strip() if os.getenv("OCI_IMAGE_ID") else None
+    OCI_COMPUTE_SHAPE = os.getenv("OCI_COMPUTE_SHAPE", ARM_SHAPE).strip()
+    SECOND_MICRO_INSTANCE = os.getenv("SECOND_MICRO_INSTANCE", 'False').strip().lower() == 'true'
+    OCI_SUBNET_ID = os.getenv("OCI_SUBNET_ID", None).strip() if os.getenv("OCI_SUBNET_ID") else None
+    OPERATING_SYSTEM = os.getenv("OPERATING_SYSTEM", "").strip()
+    OS_VERSION = os.getenv("OS_VERSION", "").strip()
+    ASSIGN_PUBLIC_IP = os.getenv("ASSIGN_PUBLIC_IP", "false").strip()
+    BOOT_VOLUME_SIZE = os.getenv("BOOT_VOLUME_SIZE", "50").strip()
+    NOTIFY_EMAIL = os.getenv("NOTIFY_EMAIL", 'False').strip().lower() == 'true'
+    EMAIL = os.getenv("EMAIL", "").strip()
+    EMAIL_PASSWORD = os.getenv("EMAIL_PASSWORD", "").strip()
+    DISCORD_WEBHOOK = os.getenv("DISCORD_WEBHOOK", "").strip()
+    TELEGRAM_TOKEN = os.getenv("TELEGRAM_TOKEN", "").strip()
+    TELEGRAM_USER_ID = os.getenv("TELEGRAM_USER_ID", "").strip()
+    # Notification delivery: endpoints can point at a local stand-in server for testing
+    TELEGRAM_API_URL = os.getenv("TELEGRAM_API_URL", "https://api.telegram.org").strip()
+    SMTP_HOST = os.getenv("SMTP_HOST", "smtp.gmail.com").strip()
+    SMTP_PORT = int(os.getenv("SMTP_PORT", "587").strip() or "587")
+    SMTP_STARTTLS = os.getenv("SMTP_STARTTLS", 'True').strip().lower() == 'true'
+    NOTIFY_TIMEOUT_SECS = float(os.getenv("NOTIFY_TIMEOUT_SECS", "10").strip() or "10")
+    NOTIFY_COALESCE_SECS = float(os.getenv("NOTIFY_COALESCE_SECS", "2").strip() or "0")
+    # Fleet mode: comma-separated PROFILE[@REGION] targets of the OCI config hunted concurrently
+    FLEET_TARGETS = os.getenv("FLEET_TARGETS", "").strip()
+    FLEET_MIN_LAUNCH_INTERVAL_SECS = float(os.getenv("FLEET_MIN_LAUNCH_INTERVAL_SECS", "1").strip() or "0")
+    FLEET_STATUS_FILE = os.getenv("FLEET_STATUS_FILE", "FLEET_STATUS.json").strip()
+    # Opt-in service limits gate: launches are held or shrunk to the headroom the Limits API reports
+    LIMITS_CHECK = os.getenv("LIMITS_CHECK", 'False').strip().lower() == 'true'
+    LIMITS_CACHE_SECS = float(os.getenv("LIMITS_CACHE_SECS", "300").strip() or "0")
+    # Opt-in capacity probing: compute capacity reports of every AD each INTERVAL, launches only go
+    # to ADs reporting room; an AD reported full for VERIFY seconds gets one launch anyway (0 never)
+    CAPACITY_PROBE = os.getenv("CAPACITY_PROBE", 'False').strip().lower() == 'true'
+    CAPACITY_PROBE_INTERVAL_SECS = float(os.getenv("CAPACITY_PROBE_INTERVAL_SECS", "10").strip() or "10")
+    CAPACITY_PROBE_VERIFY_SECS = float(os.getenv("CAPACITY_PROBE_VERIFY_SECS", "900").strip() or "0")
+    # Opt-in A1 fallback ladder: OCPUS/MEMORY_GB sizes, largest first, stepped down after AFTER_ERRORS
+    # capacity errors; an instance launched smaller is resized to the first size in the background
+    SHAPE_FALLBACK_LADDER = os.getenv("SHAPE_FALLBACK_LADDER", "").strip()
+    SHAPE_FALLBACK_AFTER_ERRORS = int(os.getenv("SHAPE_FALLBACK_AFTER_ERRORS", "30").strip() or "30")
+    SHAPE_RESIZE_RETRY_SECS = float(os.getenv("SHAPE_RESIZE_RETRY_SECS", "300").strip() or "300")
+    # Batch mode: comma-separated NAME=SHAPE[:OCPUS/MEMORY_GB] instances reconciled concurrently;
+    # E2.1.Micro instances are only accepted with the explicit ALLOW_MICRO_INSTANCES opt-in
+    BATCH_INSTANCES = os.getenv("BATCH_INSTANCES", "").strip()
+    BATCH_STATUS_FILE = os.getenv("BATCH_STATUS_FILE", "BATCH_STATUS.json").strip()
+    ALLOW_MICRO_INSTANCES = os.getenv("ALLOW_MICRO_INSTANCES", 'False').strip().lower() == 'true'
+    # Launch attempts carry an opc-retry-token: an unanswered attempt (timeout, 502/503/504) is resent
+    # under it up to RETRY_ATTEMPTS times; a copy is also sent once an attempt has been in flight
+    # longer than HEDGE_PERCENTILE of the recent launch latencies (0 disables hedging)
+    LAUNCH_RETRY_ATTEMPTS = int(os.getenv("LAUNCH_RETRY_ATTEMPTS", "2").strip() or "0")
+    LAUNCH_HEDGE_PERCENTILE = float(os.getenv("LAUNCH_HEDGE_PERCENTILE", "0").strip() or "0")
+    # Opt-in: fire launch requests against all matching ADs concurrently each round
+    RACE_ALL_ADS = os.getenv("RACE_ALL_ADS", 'False').strip().lower() == 'true'
+    # Adaptive retry scheduler: quick per-AD retries on capacity errors, jittered backoff on throttling
+    CAPACITY_RETRY_SECS = float(os.getenv("CAPACITY_RETRY_SECS", "").strip() or WAIT_TIME)
+    THROTTLE_BACKOFF_BASE_SECS = float(os.getenv("THROTTLE_BACKOFF_BASE_SECS", "").strip() or max(WAIT_TIME, 5))
+    THROTTLE_BACKOFF_MAX_SECS = float(os.getenv("THROTTLE_BACKOFF_MAX_SECS", "300").strip() or "300")
+    MIN_LAUNCH_INTERVAL_SECS = float(os.getenv("MIN_LAUNCH_INTERVAL_SECS", "1").strip() or "0")
+    AD_HISTORY_FILE = os.getenv("AD_HISTORY_FILE", "ad_history.json").strip()
+    AD_HISTORY_MAX_ENTRIES = 50
+    # Local cache of tenancy discovery results (ADs, subnet, image); TTL 0 disables it
+    DISCOVERY_CACHE_FILE = os.getenv("DISCOVERY_CACHE_FILE", ".oci_discovery_cache.json").strip()
+    DISCOVERY_CACHE_TTL_SECS = int(os.getenv("DISCOVERY_CACHE_TTL_SECS", "86400").strip() or "0")
+    DISCOVERY_CACHE_REFRESH = os.getenv("DISCOVERY_CACHE_REFRESH", 'False').strip().lower() == 'true'
+    # Scheduler checkpoint resumed by the next run; older checkpoints are ignored, MAX_AGE 0 disables it
+    HUNT_CHECKPOINT_FILE = os.getenv("HUNT_CHECKPOINT_FILE", ".hunt_checkpoint.json").strip()
+    HUNT_CHECKPOINT_MAX_AGE_SECS = int(os.getenv("HUNT_CHECKPOINT_MAX_AGE_SECS", "43200").strip() or "0")
+    HUNT_CHECKPOINT_INTERVAL_SECS = float(os.getenv("HUNT_CHECKPOINT_INTERVAL_SECS", "60").strip() or "60")
+    # Deduplicated index of the images resolved so far, keyed by image OCID; empty disables it
+    IMAGE_INDEX_FILE = os.getenv("IMAGE_INDEX_FILE", "images_list.json").strip()
+    # Daemon mode (--daemon): hunt windows of WINDOW seconds, back to back with PAUSE in between or
+    # starting at the comma-separated UTC SCHEDULE_HOURS; controlled through a Unix socket
+    DAEMON_WINDOW_SECS = int(os.getenv("DAEMON_WINDOW_SECS", "").strip() or MAX_RUNTIME_SECS or 21500)
+    DAEMON_PAUSE_SECS = float(os.getenv("DAEMON_PAUSE_SECS", "0").strip() or "0")
+    DAEMON_SCHEDULE_HOURS = os.getenv("DAEMON_SCHEDULE_HOURS", "").strip()
+    DAEMON_CONTROL_SOCKET = os.getenv("DAEMON_CONTROL_SOCKET", ".oci_daemon.sock").strip()
+    DAEMON_WATCH_INTERVAL_SECS = float(os.getenv("DAEMON_WATCH_INTERVAL_SECS", "5").strip() or "5")
+    # Instance confirmation polling: interval grows from INITIAL to MAX until the timeout
+    INSTANCE_POLL_INITIAL_SECS = float(os.getenv("INSTANCE_POLL_INITIAL_SECS", "2").strip() or "2")
+    INSTANCE_POLL_MAX_SECS = float(os.getenv("INSTANCE_POLL_MAX_SECS", "15").strip() or "15")
+    INSTANCE_CONFIRM_TIMEOUT_SECS = float(os.getenv("INSTANCE_CONFIRM_TIMEOUT_SECS", "120").strip() or "0")
+    # Time from process start to the first launch request above which a warning is logged
+    STARTUP_BUDGET_SECS = float(os.getenv("STARTUP_BUDGET_SECS", "3").strip() or "0")
+    # Attempt telemetry: JSON-lines event per launch attempt, Prometheus text file and/or endpoint
+    TELEMETRY_FILE = os.getenv("TELEMETRY_FILE", "launch_attempts.jsonl").strip()
+    METRICS_FILE = os.getenv("METRICS_FILE", "").strip()
+    METRICS_HOST = os.getenv("METRICS_HOST", "127.0.0.1").strip()
+    METRICS_PORT = int(os.getenv("METRICS_PORT", "0").strip() or "0")
+    # Append-only SQLite history of launch outcomes, analysed by capacity_stats.py; empty disables it
+    CAPACITY_DB_FILE = os.getenv("CAPACITY_DB_FILE", "capacity_history.db").strip()
+    # Client-side token buckets per endpoint family: FAMILY=REQUESTS_PER_SEC/BURST, rate 0 disables one
+    OCI_RATE_LIMITS = os.getenv("OCI_RATE_LIMITS", "launch=0.25/3,compute=5/5,identity=5/5,network=5/5,limits=1/3").strip()
+    # HTTP transport of the SDK clients: pooled keep-alive connections per OCI host, shared by all
+    # clients and workers; TCP keepalive probes stop NATs from dropping idle connections (0 disables)
+    OCI_HTTP_POOL_SIZE = int(os.getenv("OCI_HTTP_POOL_SIZE", "16").strip() or "16")
+    OCI_CONNECT_TIMEOUT_SECS = float(os.getenv("OCI_CONNECT_TIMEOUT_SECS", "10").strip() or "10")
+    OCI_READ_TIMEOUT_SECS = float(os.getenv("OCI_READ_TIMEOUT_SECS", "60").strip() or "60")
+    OCI_TCP_KEEPALIVE_SECS = int(os.getenv("OCI_TCP_KEEPALIVE_SECS", "30").strip() or "0")
+
+
+load_settings()
+OCI_USER_ID = None
+
+
+def check_ci_environment():
+    """Exit if variables required in CI/CD are missing."""
+    required_vars = ['OCI_CONFIG']
+    missing_vars = [var for var in required_vars if not os.getenv(var)]
+
+    if missing_vars and (os.getenv('CI') or os.getenv('GITHUB_ACTIONS')):
+        print(f"Missing required environment variables for CI/CD: {missing_vars}")
+        print("Please set these variables in your GitHub Actions secrets")
+        sys.exit(1)
+
+
+def validate_config_file():
+    """Validate oci_config and oci.env values, writing ERROR_IN_CONFIG.log on parse errors."""
+    global OCI_USER_ID
+    oci_config_parser = configparser.ConfigParser()
+    try:
+        oci_config_parser.read(OCI_CONFIG)
+        OCI_USER_ID = oci_config_parser.get('DEFAULT', 'user')
+        if OCI_COMPUTE_SHAPE not in (ARM_SHAPE, E2_MICRO_SHAPE):
+            raise ValueError(f"{OCI_COMPUTE_SHAPE} is not an acceptable shape")
+        env_has_spaces = any(isinstance(confg_var, str) and " " in confg_var
+                            for confg_var in [OCI_CONFIG, OCT_FREE_AD,WAIT_TIME,
+                                    SSH_AUTHORIZED_KEYS_FILE, OCI_IMAGE_ID, 
+                                    OCI_COMPUTE_SHAPE, SECOND_MICRO_INSTANCE, 
+                                    OCI_SUBNET_ID, OS_VERSION, NOTIFY_EMAIL,EMAIL,
+                                    EMAIL_PASSWORD, DISCORD_WEBHOOK]
+                            )
+        config_has_spaces = any(' ' in value for section in oci_config_parser.sections() 
+                                for _, value in oci_config_parser.items(section))
+        if env_has_spaces:
+            raise ValueError("oci.env has spaces in values which is not acceptable")
+        if config_has_spaces:
+            raise ValueError("oci_config has spaces in values which is not acceptable")        
+
+    except configparser.Error as e:
+        error_log_path = os.path.join(os.getcwd(), "ERROR_IN_CONFIG.log")
+        with open(error_log_path, "w", encoding='utf-8') as file:
+            file.write(str(e))
+
+        print(f"Error reading the configuration file: {e}")
+        # In CI/CD, we should exit on configuration errors
+        if os.getenv('CI') or os.getenv('GITHUB_ACTIONS'):
+            sys.exit(1)
+
+
+# The process environment before oci.env was loaded, it keeps precedence over oci.env on a reload
+startup_environ = None
+
+
+def get_env_file_path():
+    """Return the path of oci.env in the current directory."""
+    return os.path.join(os.getcwd(), 'oci.env')
+
+
+def load_env_file():
+    """Load oci.env into the environment, then read and validate the settings."""
+    global startup_environ
+    startup_environ = dict(os.environ)
+    load_dotenv(get_env_file_path())
+    check_ci_environment()
+    load_settings()
+    validate_config_file()
+
+
+def get_oci_config_path():
+    """Return the path of the OCI config file.
+
+    Returns:
+        str: OCI_CONFIG (absolute, or relative to the current directory), else ~/.oci/config.
+    """
+    if OCI_CONFIG:
+        return OCI_CONFIG if os.path.isabs(OCI_CONFIG) else os.path.join(os.getcwd(), OCI_CONFIG)
+    return os.path.expanduser("~/.oci/config")
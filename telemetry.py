@@ -0,0 +1,256 @@
+"""
+Attempt Telemetry
+Per launch attempt events (TELEMETRY_FILE), the capacity history database (CAPACITY_DB_FILE)
+and Prometheus metrics (METRICS_FILE / METRICS_PORT).
+"""
+
+import json
+import logging
+import os
+import sqlite3
+import threading
+import time
+from datetime import datetime, timezone
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import settings
+from scheduler import is_capacity_error
+from transport import http_connection_stats
+
+
+def attempt_outcome(srv_err=None):
+    """Classify a launch attempt for the telemetry.
+
+    Args:
+        srv_err (oci.exceptions.ServiceError, optional): The error of the attempt, None on success.
+
+    Returns:
+        str: 'success', 'capacity', 'throttled', 'limit' or 'error'.
+    """
+    if srv_err is None:
+        return "success"
+    if is_capacity_error(srv_err):
+        return "capacity"
+    if srv_err.status == 429 or srv_err.code == "TooManyRequests":
+        return "throttled"
+    if srv_err.code == "LimitExceeded":
+        return "limit"
+    return "error"
+
+
+CAPACITY_DB_SCHEMA = """
+CREATE TABLE IF NOT EXISTS attempts (
+    ts INTEGER NOT NULL,
+    region TEXT NOT NULL,
+    ad TEXT NOT NULL,
+    shape TEXT NOT NULL,
+    outcome TEXT NOT NULL,
+    code TEXT,
+    latency_ms INTEGER
+)
+"""
+
+
+class AttemptTelemetry:
+    """Structured record of the launch loop.
+
+    Every launch attempt is appended as one JSON line to TELEMETRY_FILE and as one row to the
+    CAPACITY_DB_FILE SQLite history, and counters and latency histograms are kept in memory for
+    the Prometheus text format, written to METRICS_FILE and/or served on METRICS_HOST:METRICS_PORT.
+    """
+
+    LATENCY_BUCKETS = (0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0, 60.0)
+    # Minimum seconds between two METRICS_FILE rewrites during the hunt
+    METRICS_FILE_INTERVAL_SECS = 5.0
+    METRICS = {
+        "oci_launch_attempts_total": ("counter", "Launch attempts by target, AD and outcome."),
+        "oci_launch_backoff_seconds_total": ("counter", "Backoff chosen after failed launch attempts."),
+        "oci_launch_attempt_duration_seconds": ("histogram", "Latency of launch_instance calls."),
+        "oci_api_requests_total": ("counter", "Other OCI API calls by method and HTTP status."),
+        "oci_api_request_duration_seconds": ("histogram", "Latency of other OCI API calls."),
+        "oci_rate_limiter_wait_seconds_total": ("counter", "Time spent waiting for the client-side rate limiter."),
+        "oci_http_requests_total": ("counter", "HTTP requests sent to OCI by transport and host."),
+        "oci_http_connections_opened_total": ("counter", "Connections (TLS handshakes) opened to OCI by transport and host."),
+    }
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._counters = {}
+        self._histograms = {}
+        self._db = None
+        self._db_path = None
+        self._metrics_written_at = None
+
+    def _append_capacity_row(self, row):
+        # Called with the lock held; a broken history must never stop the hunt
+        db_path = os.path.join(os.getcwd(), settings.CAPACITY_DB_FILE)
+        try:
+            if self._db_path != db_path:
+                if self._db is not None:
+                    self._db.close()
+                self._db = sqlite3.connect(db_path, check_same_thread=False)
+                self._db.execute(CAPACITY_DB_SCHEMA)
+                self._db_path = db_path
+            self._db.execute("INSERT INTO attempts VALUES (?, ?, ?, ?, ?, ?, ?)", row)
+            self._db.commit()
+        except sqlite3.Error as db_err:
+            logging.warning("Could not record the attempt in %s: %s", settings.CAPACITY_DB_FILE, db_err)
+
+    def _inc(self, name, labels, value=1.0):
+        key = tuple(sorted(labels.items()))
+        series = self._counters.setdefault(name, {})
+        series[key] = series.get(key, 0.0) + value
+
+    def _observe(self, name, labels, value):
+        key = tuple(sorted(labels.items()))
+        buckets, total, count = self._histograms.setdefault(name, {}).get(
+            key, ([0] * len(self.LATENCY_BUCKETS), 0.0, 0))
+        buckets = [n + (value <= bound) for n, bound in zip(buckets, self.LATENCY_BUCKETS)]
+        self._histograms[name][key] = (buckets, total + value, count + 1)
+
+    def record_attempt(self, target, ad_name, latency, srv_err=None, response=None, attempt=None, backoff=None,
+                       region=None, shape=None):
+        """Record one launch attempt.
+
+        Args:
+            target (str): Name of the hunt target (OciClients.name).
+            ad_name (str): The availability domain.
+            latency (float): Seconds the launch_instance call took.
+            srv_err (oci.exceptions.ServiceError, optional): The error of the attempt.
+            response (oci.response.Response, optional): The response of a successful attempt.
+            attempt (int, optional): The attempt number in this AD.
+            backoff (float, optional): Seconds the scheduler waits before retrying this AD.
+            region (str, optional): The region of the target.
+            shape (str, optional): The shape launched. Defaults to OCI_COMPUTE_SHAPE.
+        """
+        outcome = attempt_outcome(srv_err)
+        shape = shape or settings.OCI_COMPUTE_SHAPE
+        event = {
+            "ts": datetime.now(timezone.utc).isoformat(),
+            "target": target,
+            "region": region,
+            "ad": ad_name,
+            "shape": shape,
+            "attempt": attempt,
+            "latency_secs": round(latency, 3),
+            "status": srv_err.status if srv_err is not None else getattr(response, "status", None),
+            "code": srv_err.code if srv_err is not None else None,
+            "opc_request_id": (srv_err.request_id if srv_err is not None
+                               else getattr(response, "request_id", None)),
+            "backoff_secs": None if backoff is None else round(backoff, 3),
+            "outcome": outcome,
+        }
+        labels = {"target": target, "ad": ad_name}
+        with self._lock:
+            self._inc("oci_launch_attempts_total", dict(labels, outcome=outcome))
+            self._observe("oci_launch_attempt_duration_seconds", labels, latency)
+            if backoff:
+                self._inc("oci_launch_backoff_seconds_total", labels, backoff)
+            if settings.TELEMETRY_FILE:
+                try:
+                    with open(os.path.join(os.getcwd(), settings.TELEMETRY_FILE), "a", encoding="utf-8") as events_file:
+                        events_file.write(json.dumps(event) + "\n")
+                except OSError as file_err:
+                    logging.warning("Could not record the attempt in %s: %s", settings.TELEMETRY_FILE, file_err)
+            if settings.CAPACITY_DB_FILE:
+                self._append_capacity_row((int(time.time()), region or "", ad_name, shape, outcome,
+                                           event["code"], int(latency * 1000)))
+        self.write_metrics_file()
+
+    def observe_call(self, method, latency, status):
+        """Record an OCI API call other than a launch (see execute_oci_command)."""
+        with self._lock:
+            self._inc("oci_api_requests_total", {"method": method, "status": str(status)})
+            self._observe("oci_api_request_duration_seconds", {"method": method}, latency)
+
+    def observe_rate_limit_wait(self, family, waited):
+        """Record time a call waited for a token of the rate limiter."""
+        with self._lock:
+            self._inc("oci_rate_limiter_wait_seconds_total", {"family": family}, waited)
+
+    def render(self):
+        """Render all metrics in the Prometheus text exposition format.
+
+        Returns:
+            str: The metrics.
+        """
+        def fmt(labels):
+            if not labels:
+                return ""
+            escaped = (str(value).replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+                       for _, value in labels)
+            return "{" + ",".join(f'{key}="{value}"' for (key, _), value in zip(labels, escaped)) + "}"
+
+        lines = []
+        connection_stats = http_connection_stats()
+        with self._lock:
+            # The connection pools keep their own counters, copy them in at render time
+            for (transport, host), (requests_sent, connections) in connection_stats.items():
+                labels = (("host", host), ("transport", transport))
+                self._counters.setdefault("oci_http_requests_total", {})[labels] = float(requests_sent)
+                self._counters.setdefault("oci_http_connections_opened_total", {})[labels] = float(connections)
+            for name, (metric_type, help_text) in self.METRICS.items():
+                lines += [f"# HELP {name} {help_text}", f"# TYPE {name} {metric_type}"]
+                for labels, value in sorted(self._counters.get(name, {}).items()):
+                    lines.append(f"{name}{fmt(labels)} {value:g}")
+                for labels, (buckets, total, count) in sorted(self._histograms.get(name, {}).items()):
+                    for bound, bucket_count in zip(self.LATENCY_BUCKETS, buckets):
+                        lines.append(f"{name}_bucket{fmt(labels + (('le', f'{bound:g}'),))} {bucket_count}")
+                    lines.append(f"{name}_bucket{fmt(labels + (('le', '+Inf'),))} {count}")
+                    lines.append(f"{name}_sum{fmt(labels)} {total:g}")
+                    lines.append(f"{name}_count{fmt(labels)} {count}")
+        return "\n".join(lines) + "\n"
+
+    def write_metrics_file(self, force=False):
+        """Atomically rewrite METRICS_FILE (e.g. for the node_exporter textfile collector).
+
+        Args:
+            force (bool, optional): Write even if the file was written less than
+                METRICS_FILE_INTERVAL_SECS ago, e.g. at exit.
+        """
+        if not settings.METRICS_FILE:
+            return
+        now = time.monotonic()
+        if (not force and self._metrics_written_at is not None
+                and now - self._metrics_written_at < self.METRICS_FILE_INTERVAL_SECS):
+            return
+        self._metrics_written_at = now
+        metrics_path = os.path.join(os.getcwd(), settings.METRICS_FILE)
+        tmp_path = f"{metrics_path}.tmp"
+        try:
+            with open(tmp_path, "w", encoding="utf-8") as metrics_file:
+                metrics_file.write(self.render())
+            os.replace(tmp_path, metrics_path)
+        except OSError as file_err:
+            logging.warning("Could not write the metrics to %s: %s", settings.METRICS_FILE, file_err)
+
+    def serve(self, host, port):
+        """Serve the metrics on http://host:port/metrics from a daemon thread.
+
+        Returns:
+            ThreadingHTTPServer: The running server.
+        """
+        telemetry_ref = self
+
+        class MetricsHandler(BaseHTTPRequestHandler):
+            def do_GET(self):
+                if self.path.split("?")[0] not in ("/", "/metrics"):
+                    self.send_error(404)
+                    return
+                body = telemetry_ref.render().encode("utf-8")
+                self.send_response(200)
+                self.send_header("Content-Type", "text/plain; version=0.0.4; charset=utf-8")
+                self.send_header("Content-Length", str(len(body)))
+                self.end_headers()
+                self.wfile.write(body)
+
+            def log_message(self, *args):
+                pass
+
+        server = ThreadingHTTPServer((host, port), MetricsHandler)
+        threading.Thread(target=server.serve_forever, name="metrics-http", daemon=True).start()
+        logging.info("📈 Serving metrics on http://%s:%s/metrics", host, server.server_address[1])
+        return server
+
+
+telemetry = AttemptTelemetry()
@@ -0,0 +1,36 @@
+import os
+import shutil
+import sys
+
+import pytest
+
+REPO_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, REPO_ROOT)
+
+import benchmark  # noqa: E402
+import settings  # noqa: E402
+
+
+@pytest.fixture
+def hunt_env(tmp_path, monkeypatch):
+    """Point the settings at the fake tenancy and run in an empty working directory.
+
+    Yields a function applying further settings, e.g. hunt_env(RACE_ALL_ADS="true").
+    """
+    def configure(**values):
+        for key, value in values.items():
+            monkeypatch.setenv(key, str(value))
+        settings.load_settings()
+
+    monkeypatch.chdir(tmp_path)
+    shutil.copy(os.path.join(REPO_ROOT, "email_content.html"), tmp_path)
+    public_key = tmp_path / "id_rsa.pub"
+    public_key.write_text("ssh-rsa AAAAB3NzaC1yc2EAAAADAQABAAABAQCtest test\n", encoding="utf-8")
+    for key, value in benchmark.BENCHMARK_ENV.items():
+        monkeypatch.setenv(key, value)
+    monkeypatch.setenv("SSH_AUTHORIZED_KEYS_FILE", str(public_key))
+    configure(MAX_RUNTIME_SECS=3600)
+    yield configure
+    monkeypatch.undo()
+    settings.load_settings()
+
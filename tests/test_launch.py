@@ -0,0 +1,103 @@
+import json
+import threading
+
+import benchmark
+import fake_oci
+import hunt
+import settings
+
+
+def open_capacity(**overrides):
+    """A scenario whose ADs always have room and never throttle."""
+    return fake_oci.load_scenario(overrides=dict(capacity_every=[0.001], capacity_window=10 ** 9,
+                                                 window_success_prob=1.0, throttle_rate=0.0,
+                                                 bad_gateway_rate=0.0, **overrides))
+
+
+def no_capacity(**overrides):
+    """A scenario whose ADs never have room and never throttle."""
+    return fake_oci.load_scenario(overrides=dict(window_success_prob=0.0, throttle_rate=0.0,
+                                                 bad_gateway_rate=0.0, **overrides))
+
+
+def launch_details(ad_name):
+    """The LaunchInstanceDetails of a full-size A1 instance in an AD of the fake tenancy."""
+    return hunt.oci.core.models.LaunchInstanceDetails(
+        availability_domain=ad_name, compartment_id=fake_oci.TENANCY_ID, display_name="test",
+        shape=settings.ARM_SHAPE,
+        shape_config=hunt.oci.core.models.LaunchInstanceShapeConfigDetails(ocpus=4, memory_in_gbs=24))
+
+
+class SimultaneousComputeClient(fake_oci.FakeComputeClient):
+    """Holds every launch until all ADs of the race sent theirs, so each one gets an instance."""
+
+    def __init__(self, service):
+        super().__init__(service)
+        self.barrier = threading.Barrier(len(service.ad_names))
+
+    def launch_instance(self, launch_instance_details, opc_retry_token=None, **kwargs):
+        self.barrier.wait(timeout=10)
+        return super().launch_instance(launch_instance_details, opc_retry_token, **kwargs)
+
+
+def test_race_keeps_the_winner_and_terminates_the_losers(hunt_env):
+    service = fake_oci.FakeOciService(open_capacity(), seed=1)
+    clients = benchmark.fake_clients(service, compute=SimultaneousComputeClient(service))
+    templates = {ad_name: launch_details(ad_name) for ad_name in service.ad_names}
+
+    winner_ad, winner_response, errors = hunt.race_launch_across_ads(service.ad_names, templates, clients)
+
+    assert errors == {}
+    assert winner_response.data.availability_domain == winner_ad
+    states = {instance.id: instance.lifecycle_state for instance in service.instances.values()}
+    assert len(states) == len(service.ad_names)
+    assert states.pop(winner_response.data.id) == "PROVISIONING"
+    assert set(states.values()) == {"TERMINATED"}
+    assert service.calls["terminate_instance"] == len(service.ad_names) - 1
+
+
+def test_unanswered_launch_is_resent_under_the_same_retry_token(hunt_env):
+    service = fake_oci.FakeOciService(open_capacity(lost_response_rate=1.0), seed=1)
+    launcher = hunt.IdempotentLauncher(benchmark.fake_clients(service), retries=1)
+    ad_name = service.ad_names[0]
+    token = launcher.token(ad_name, 1)
+
+    response = launcher.launch(ad_name, launch_details(ad_name), token)
+
+    assert service.errors["LostResponse"] == 1
+    assert service.calls["launch_instance"] == 2
+    assert service.launch_attempts == 1
+    assert list(service.instances) == [response.data.id]
+    assert service.retry_tokens == {token: response.data}
+
+
+def test_hunt_with_lost_launch_responses_creates_one_instance(hunt_env):
+    hunt_env(LAUNCH_RETRY_ATTEMPTS=2)
+    service = fake_oci.FakeOciService(open_capacity(lost_response_rate=1.0), seed=1)
+
+    assert hunt.launch_instance(benchmark.fake_clients(service))
+
+    assert len(service.instances) == 1
+    assert service.launch_attempts == 1
+    assert len(service.retry_tokens) == 1
+
+
+def test_hunt_resumes_the_checkpoint_of_the_previous_run(hunt_env, caplog):
+    hunt_env(HUNT_CHECKPOINT_MAX_AGE_SECS=43200, MAX_RUNTIME_SECS=900)
+    clock = fake_oci.VirtualClock()
+    first = fake_oci.FakeOciService(no_capacity(), clock, seed=1)
+
+    assert not hunt.launch_instance(benchmark.fake_clients(first))
+
+    with open(settings.HUNT_CHECKPOINT_FILE, "r", encoding="utf-8") as checkpoint_file:
+        (checkpoint,) = json.load(checkpoint_file).values()
+    saved_attempts = sum(ad["attempts"] for ad in checkpoint["ads"].values())
+    assert saved_attempts == first.launch_attempts > 0
+
+    second = fake_oci.FakeOciService(open_capacity(), clock, seed=2)
+    with caplog.at_level("INFO", logger="launch_instance"):
+        assert hunt.launch_instance(benchmark.fake_clients(second))
+
+    assert f"Resuming hunt from {settings.HUNT_CHECKPOINT_FILE} after {saved_attempts} previous attempts" in caplog.text
+    with open(settings.HUNT_CHECKPOINT_FILE, "r", encoding="utf-8") as checkpoint_file:
+        assert json.load(checkpoint_file) == {}
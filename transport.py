@@ -0,0 +1,116 @@
+"""
+HTTP Transport
+The pooled keep-alive HTTP transport shared by every OCI SDK client of the process.
+"""
+
+import functools
+import logging
+import socket
+import threading
+
+import settings
+from deadline import remaining_runtime
+from lazy_imports import oci
+
+
+def tcp_keepalive_options():
+    """Socket options enabling TCP keepalive probes after OCI_TCP_KEEPALIVE_SECS of idleness.
+
+    Returns:
+        list: (level, option, value) tuples, empty when keepalive is disabled.
+    """
+    if settings.OCI_TCP_KEEPALIVE_SECS <= 0:
+        return []
+    options = [(socket.SOL_SOCKET, socket.SO_KEEPALIVE, 1)]
+    # Fine-grained timers are platform specific (Linux; macOS only knows TCP_KEEPALIVE)
+    for name, value in (("TCP_KEEPIDLE", settings.OCI_TCP_KEEPALIVE_SECS),
+                        ("TCP_KEEPINTVL", max(1, settings.OCI_TCP_KEEPALIVE_SECS // 3)), ("TCP_KEEPCNT", 3)):
+        if hasattr(socket, name):
+            options.append((socket.IPPROTO_TCP, getattr(socket, name), value))
+    return options
+
+
+http_adapter = None
+http_adapter_lock = threading.Lock()
+
+
+def send_within_run_deadline(send, request, timeout=None, **kwargs):
+    """HTTPAdapter.send wrapper capping the connect and read timeouts to the time left in the run."""
+    remaining = remaining_runtime()
+    if remaining != float("inf"):
+        cap = max(1.0, remaining)
+        if isinstance(timeout, tuple):
+            timeout = tuple(cap if part is None else min(part, cap) for part in timeout)
+        else:
+            timeout = cap if timeout is None else min(timeout, cap)
+    return send(request, timeout=timeout, **kwargs)
+
+
+def get_http_adapter():
+    """Return the HTTPS transport adapter shared by every SDK client of the process.
+
+    One pool of keep-alive connections per OCI host (compute, network and work requests all
+    live on iaas.<region>), so a retry every few seconds reuses a warm TLS connection instead
+    of paying a new handshake, whichever client or worker thread sends it.
+
+    Returns:
+        oci.base_client.OCIHTTPAdapter: The adapter.
+    """
+    global http_adapter
+    with http_adapter_lock:
+        if http_adapter is None:
+            # pool_connections is the number of hosts kept, pool_maxsize the connections per host
+            http_adapter = oci.base_client.OCIHTTPAdapter(pool_connections=32, pool_maxsize=settings.OCI_HTTP_POOL_SIZE)
+            http_adapter.poolmanager.connection_pool_kw["socket_options"] = (
+                list(oci.base_client.urllib3.connection.HTTPConnection.default_socket_options)
+                + tcp_keepalive_options())
+            # A request sent just before the run deadline must not outlive it
+            http_adapter.send = functools.partial(send_within_run_deadline, http_adapter.send)
+    return http_adapter
+
+
+def build_sdk_client(client_class, oci_config):
+    """Build an OCI SDK client on the shared connection pool.
+
+    SDK-level retries are disabled explicitly (OCI_SDK_DEFAULT_RETRY_ENABLED would otherwise
+    enable them): the launch scheduler and execute_oci_command() own the retry policy.
+
+    Args:
+        client_class (type): The SDK client class, e.g. oci.core.ComputeClient.
+        oci_config (dict): The OCI config of the target.
+
+    Returns:
+        The SDK client.
+    """
+    client = client_class(oci_config, timeout=(settings.OCI_CONNECT_TIMEOUT_SECS, settings.OCI_READ_TIMEOUT_SECS),
+                          retry_strategy=oci.retry.NoneRetryStrategy())
+    client.base_client.session.mount("https://", get_http_adapter())
+    return client
+
+
+def http_connection_stats():
+    """Requests sent and connections opened per OCI host by the shared SDK pool.
+
+    Returns:
+        dict: [requests, connections] keyed by (transport, host).
+    """
+    stats = {}
+    if http_adapter is not None:
+        pools = http_adapter.poolmanager.pools
+        for pool in (pools.get(key) for key in pools.keys()):
+            if pool is None:
+                continue
+            entry = stats.setdefault(("sdk", pool.host), [0, 0])
+            entry[0] += pool.num_requests
+            entry[1] += pool.num_connections
+    return stats
+
+
+def log_connection_reuse():
+    """Log how many OCI requests reused a pooled connection (each new connection is a TLS handshake)."""
+    stats = http_connection_stats()
+    requests_sent = sum(entry[0] for entry in stats.values())
+    connections = sum(entry[1] for entry in stats.values())
+    if requests_sent:
+        logging.info("🔌 OCI connection reuse: %.1f%% (%d requests over %d connections)",
+                     100.0 * (requests_sent - connections) / requests_sent, requests_sent, connections)
@@ -3,10 +3,37 @@
 Setup Validation Script
 This script validates that all necessary files and configurations are in place
 for the Oracle Cloud VPS creation script to work properly.
+
+With --preflight it also checks the configuration the way main.py will use it: the OCI
+config and API key, the Always-Free compliance and, through read-only OCI API calls, the
+credentials, availability domains, image and subnet. All checks run concurrently, and a
+configuration that passed every API probe is remembered so unchanged runs skip them.
+
+Examples:
+    python validate_setup.py
+    python validate_setup.py --preflight
+    python validate_setup.py --preflight --force
 """
 
+import argparse
+import hashlib
+import json
+import logging
 import os
 import sys
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+# Settings of main.py whose change invalidates the remembered preflight result
+PREFLIGHT_SETTINGS = ["OCI_CONFIG", "OCT_FREE_AD", "OCI_COMPUTE_SHAPE", "OCI_IMAGE_ID", "OCI_SUBNET_ID",
+                      "OPERATING_SYSTEM", "OS_VERSION", "ASSIGN_PUBLIC_IP", "BOOT_VOLUME_SIZE",
+                      "SHAPE_FALLBACK_LADDER", "BATCH_INSTANCES", "ALLOW_MICRO_INSTANCES"]
+
+# Modules main.py is built from
+SCRIPT_MODULES = ["settings.py", "lazy_imports.py", "deadline.py", "transport.py", "scheduler.py", "telemetry.py",
+                  "rate_limiter.py", "notifications.py", "hunt.py", "fleet.py", "daemon.py"]
+
+STATUS_ICONS = {"ok": "✅", "failed": "❌", "inconclusive": "⚠️ "}
 
 def check_file_exists(filepath, description):
     """Check if a file exists and print status."""
@@ -64,6 +91,8 @@ def main():
     # Check required files
     files_ok = True
     files_ok &= check_file_exists("main.py", "Main Python script")
+    for module in SCRIPT_MODULES:
+        files_ok &= check_file_exists(module, "Script module")
     files_ok &= check_file_exists("requirements.txt", "Python requirements")
     files_ok &= check_file_exists("oci.env", "Environment configuration")
     files_ok &= check_file_exists("sample_oci_config", "Sample OCI configuration")
@@ -115,5 +144,262 @@ def main():
         print("❌ Some validation checks failed. Please fix the issues above.")
         return 1
 
+def is_transient_error(err, oci):
+    """Check whether a probe failed because of throttling or an outage rather than the config.
+
+    Args:
+        err (Exception): The error of the probe.
+        oci (module): The OCI SDK.
+
+    Returns:
+        bool: True for 429s, 5xx errors, timeouts and dropped connections.
+    """
+    if isinstance(err, oci.exceptions.ServiceError):
+        return err.status == 429 or err.status >= 500
+    return isinstance(err, (oci.exceptions.RequestException, ConnectionError, TimeoutError))
+
+
+def run_checks(checks, oci):
+    """Run checks concurrently and print their results in order.
+
+    Args:
+        checks (list): (description, function) pairs; a function returns a detail string
+            or raises on a failed check.
+        oci (module): The OCI SDK, to tell transient API errors apart.
+
+    Returns:
+        list: The status ('ok', 'failed' or 'inconclusive') of every check.
+    """
+    def run(check):
+        description, func = check
+        started = time.monotonic()
+        try:
+            status, detail = "ok", func()
+        except Exception as err:
+            status = "inconclusive" if is_transient_error(err, oci) else "failed"
+            detail = getattr(err, "message", None) or str(err)
+        return description, status, detail, time.monotonic() - started
+
+    with ThreadPoolExecutor(max_workers=len(checks)) as executor:
+        results = list(executor.map(run, checks))
+    for description, status, detail, elapsed in results:
+        print(f"{STATUS_ICONS[status]} {description}: {detail} ({elapsed:.1f}s)")
+    return [status for _, status, _, _ in results]
+
+
+def requested_ads(settings):
+    """Return the entries of OCT_FREE_AD."""
+    return [ad.strip() for ad in settings.OCT_FREE_AD.split(",") if ad.strip()]
+
+
+def check_settings(settings):
+    """Check that the settings main.py needs to build a launch request are present."""
+    missing = []
+    if not settings.DISPLAY_NAME and not settings.BATCH_INSTANCES:
+        missing.append("DISPLAY_NAME")
+    if not settings.OCI_IMAGE_ID:
+        missing += [name for name in ("OPERATING_SYSTEM", "OS_VERSION") if not getattr(settings, name)]
+    if missing:
+        raise ValueError(f"Missing {', '.join(missing)}")
+    return f"{settings.OCI_COMPUTE_SHAPE} in {requested_ads(settings) or 'every AD'}"
+
+
+def check_api_key(oci_config):
+    """Check that the private key of the OCI config matches its fingerprint.
+
+    OCI fingerprints are the MD5 of the DER-encoded public key, so a mismatch is caught
+    here instead of as a 401 on the first API call.
+    """
+    from cryptography.hazmat.primitives import serialization
+
+    if oci_config.get("key_content"):
+        pem = oci_config["key_content"].encode()
+    else:
+        with open(os.path.expanduser(oci_config["key_file"]), "rb") as key_file:
+            pem = key_file.read()
+    pass_phrase = oci_config.get("pass_phrase")
+    private_key = serialization.load_pem_private_key(pem, pass_phrase.encode() if pass_phrase else None)
+    public_der = private_key.public_key().public_bytes(serialization.Encoding.DER,
+                                                       serialization.PublicFormat.SubjectPublicKeyInfo)
+    fingerprint = ":".join(f"{byte:02x}" for byte in hashlib.md5(public_der).digest())
+    if fingerprint != oci_config["fingerprint"].strip().lower():
+        raise ValueError(f"The private key has fingerprint {fingerprint}, "
+                         f"the OCI config expects {oci_config['fingerprint']}")
+    return fingerprint
+
+
+def check_compliance(settings, clients):
+    """Run the Always-Free compliance checks of main.py, including the batch allowance."""
+    from fleet import parse_instance_specs, validate_batch_compliance
+    from hunt import validate_always_free_compliance
+
+    validate_always_free_compliance(clients.region)
+    if settings.BATCH_INSTANCES:
+        specs = parse_instance_specs(settings.BATCH_INSTANCES)
+        validate_batch_compliance(specs)
+        return f"{len(specs)} batch instances within the allowance"
+    return f"{settings.OCI_COMPUTE_SHAPE} with a {settings.BOOT_VOLUME_SIZE} GB boot volume in {clients.region}"
+
+
+def probe_availability_domains(settings, clients):
+    """Authenticate and check that every OCT_FREE_AD entry names an AD of the region."""
+    ad_names = [ad.name for ad in clients.iam.list_availability_domains(compartment_id=clients.tenancy).data]
+    unknown = [ad for ad in requested_ads(settings) if not any(name.endswith(ad) for name in ad_names)]
+    if unknown:
+        raise ValueError(f"OCT_FREE_AD entries {unknown} match none of {ad_names}")
+    return f"authenticated, {len(ad_names)} ADs in {clients.region}"
+
+
+def probe_image(settings, clients, oci):
+    """Check that OCI_IMAGE_ID is available for the shape, or that OPERATING_SYSTEM / OS_VERSION resolve."""
+    from hunt import resolve_image
+
+    shape = settings.OCI_COMPUTE_SHAPE
+    if not settings.OCI_IMAGE_ID:
+        image = resolve_image(clients.tenancy, shape, clients)
+        return f"resolves to {image.display_name}"
+    image = clients.compute.get_image(settings.OCI_IMAGE_ID).data
+    if image.lifecycle_state != "AVAILABLE":
+        raise ValueError(f"OCI_IMAGE_ID {image.display_name} is {image.lifecycle_state}")
+    try:
+        clients.compute.get_image_shape_compatibility_entry(settings.OCI_IMAGE_ID, shape)
+    except oci.exceptions.ServiceError as srv_err:
+        if srv_err.status != 404:
+            raise
+        raise ValueError(f"OCI_IMAGE_ID {image.display_name} does not support {shape}") from None
+    return f"{image.display_name} supports {shape}"
+
+
+def probe_subnet(settings, clients):
+    """Check that OCI_SUBNET_ID is usable in every requested AD, or that a subnet can be found."""
+    if not settings.OCI_SUBNET_ID:
+        subnets = clients.network.list_subnets(compartment_id=clients.tenancy, lifecycle_state="AVAILABLE").data
+        if not subnets:
+            raise ValueError("No subnet found in the tenancy compartment, create a VCN or set OCI_SUBNET_ID")
+        return f"will use {subnets[0].display_name}"
+    subnet = clients.network.get_subnet(settings.OCI_SUBNET_ID).data
+    if subnet.lifecycle_state != "AVAILABLE":
+        raise ValueError(f"OCI_SUBNET_ID {subnet.display_name} is {subnet.lifecycle_state}")
+    if subnet.availability_domain:
+        # An AD-specific subnet rejects launches in every other AD
+        ads = requested_ads(settings)
+        if not ads or any(not subnet.availability_domain.endswith(ad) for ad in ads):
+            raise ValueError(f"OCI_SUBNET_ID {subnet.display_name} only serves {subnet.availability_domain}, "
+                             f"set OCT_FREE_AD to that AD or use a regional subnet")
+    if subnet.prohibit_public_ip_on_vnic and settings.ASSIGN_PUBLIC_IP.lower() in ["true", "1", "y", "yes"]:
+        raise ValueError(f"OCI_SUBNET_ID {subnet.display_name} is private but ASSIGN_PUBLIC_IP is set")
+    return f"{subnet.display_name} ({subnet.availability_domain or 'regional'})"
+
+
+def config_fingerprint(settings, oci_config):
+    """Hash the OCI config, the API key and the settings the API probes depend on.
+
+    Returns:
+        str: The SHA-256 hex digest.
+    """
+    digest = hashlib.sha256()
+    for name in PREFLIGHT_SETTINGS:
+        digest.update(f"{name}={getattr(settings, name, '')}\n".encode())
+    for path in (settings.get_oci_config_path(), oci_config.get("key_file")):
+        if path and os.path.exists(os.path.expanduser(path)):
+            with open(os.path.expanduser(path), "rb") as config_file:
+                digest.update(config_file.read())
+    return digest.hexdigest()
+
+
+def load_preflight_cache(cache_file, ttl_secs):
+    """Return the remembered preflight fingerprint and its time, ('', 0) if missing or expired."""
+    try:
+        with open(cache_file, "r", encoding="utf-8") as f:
+            cached = json.load(f)
+    except (OSError, ValueError):
+        return "", 0
+    if not isinstance(cached, dict) or time.time() - cached.get("checked_at", 0) > ttl_secs:
+        return "", 0
+    return cached.get("fingerprint", ""), cached["checked_at"]
+
+
+def preflight(force=False):
+    """Check the configuration locally and against the OCI API before a hunt starts.
+
+    Local checks and read-only API probes run concurrently. When the fingerprint of the
+    configuration matches the last run whose probes all passed (within PREFLIGHT_CACHE_TTL_SECS),
+    the probes are skipped. Throttling and OCI outages make a probe inconclusive, not failed.
+
+    Args:
+        force (bool): Run the API probes even if the configuration is unchanged.
+
+    Returns:
+        int: 0 if nothing failed, 1 otherwise.
+    """
+    from dotenv import load_dotenv
+
+    import settings
+    from hunt import OciClients
+    from lazy_imports import oci
+
+    load_dotenv(settings.get_env_file_path())
+    settings.load_settings()
+    # Compliance errors are printed by run_checks, keep main.py's log lines out of the report
+    logging.basicConfig(handlers=[logging.NullHandler()])
+    cache_file = os.getenv("PREFLIGHT_CACHE_FILE", ".preflight_ok.json").strip()
+    cache_ttl_secs = int(os.getenv("PREFLIGHT_CACHE_TTL_SECS", "86400").strip() or "86400")
+
+    print("🚦 Oracle Cloud VPS Creation - Preflight")
+    print("=" * 50)
+
+    # Every other check needs the OCI config, so it is loaded first
+    config_path = settings.get_oci_config_path()
+    try:
+        oci_config = oci.config.from_file(config_path)
+        oci.config.validate_config(oci_config)
+    except Exception as err:
+        print(f"❌ OCI config {config_path}: {err}")
+        return 1
+    print(f"✅ OCI config {config_path}: region {oci_config.get('region')}")
+    clients = OciClients(oci_config, subnet_id=settings.OCI_SUBNET_ID, image_id=settings.OCI_IMAGE_ID)
+
+    checks = [
+        ("Settings", lambda: check_settings(settings)),
+        ("API key", lambda: check_api_key(oci_config)),
+        ("Always-Free compliance", lambda: check_compliance(settings, clients)),
+    ]
+    fingerprint = config_fingerprint(settings, oci_config)
+    cached_fingerprint, checked_at = (load_preflight_cache(cache_file, cache_ttl_secs)
+                                      if cache_file and cache_ttl_secs > 0 else ("", 0))
+    probes_cached = not force and cached_fingerprint == fingerprint
+    if probes_cached:
+        print(f"ℹ️  Configuration unchanged since the preflight of "
+              f"{time.strftime('%Y-%m-%d %H:%M', time.gmtime(checked_at))} UTC, skipping the API probes")
+    else:
+        checks += [
+            ("Credentials and ADs", lambda: probe_availability_domains(settings, clients)),
+            ("Image", lambda: probe_image(settings, clients, oci)),
+            ("Subnet", lambda: probe_subnet(settings, clients)),
+        ]
+    statuses = run_checks(checks, oci)
+
+    print("\n📊 Preflight Summary")
+    print("=" * 50)
+    if "failed" in statuses:
+        if cache_file and os.path.exists(cache_file):
+            os.remove(cache_file)
+        print("❌ Preflight failed. Fix the issues above before starting a hunt.")
+        return 1
+    if "inconclusive" in statuses:
+        print("⚠️  Some API probes were inconclusive (throttling or OCI errors), they run again next time.")
+    elif not probes_cached and cache_file:
+        with open(cache_file, "w", encoding="utf-8") as f:
+            json.dump({"fingerprint": fingerprint, "checked_at": time.time()}, f)
+    print("🎉 Preflight passed!")
+    return 0
+
+
 if __name__ == "__main__":
-    sys.exit(main())
\ No newline at end of file
+    parser = argparse.ArgumentParser(description="Validate the setup of the Oracle Cloud VPS creation script.")
+    parser.add_argument("--preflight", action="store_true",
+                        help="check the configuration locally and with read-only OCI API probes")
+    parser.add_argument("--force", action="store_true",
+                        help="with --preflight, run the API probes even if the configuration is unchanged")
+    args = parser.parse_args()
+    sys.exit(preflight(args.force) if args.preflight else main())
\ No newline at end of file